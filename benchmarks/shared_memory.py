@@ -0,0 +1,62 @@
+""" Compare the duration of Engine.put and Engine.get through the engine 
+    channel and through shared memory, for increasing array sizes.
+    
+    Usage: python3 benchmarks/shared_memory.py [repetitions]
+"""
+
+import sys
+import time
+
+import numpy
+
+import meg
+
+def measure(function, repetitions):
+    durations = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter()-start)
+    return min(durations)
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    
+    print(
+        "{:>12} {:>12} {:>12} {:>12} {:>12}".format(
+            "size (B)", "put (s)", "put shm (s)", "get (s)", "get shm (s)"))
+    
+    crossover = {"put": None, "get": None}
+    with meg.Engine() as engine:
+        for exponent in range(10, 31, 2):
+            data = numpy.random.random(2**exponent//8)
+            
+            durations = {}
+            for threshold in [None, 0]:
+                engine.shared_memory_threshold = threshold
+                durations["put", threshold] = measure(
+                    lambda: engine.put("data", data), repetitions)
+                durations["get", threshold] = measure(
+                    lambda: engine.get("data"), repetitions)
+            engine("clear data")
+            
+            print(
+                "{:>12} {:>12.6f} {:>12.6f} {:>12.6f} {:>12.6f}".format(
+                    data.nbytes, 
+                    durations["put", None], durations["put", 0],
+                    durations["get", None], durations["get", 0]))
+            for operation in crossover:
+                if (
+                        crossover[operation] is None 
+                        and durations[operation, 0] 
+                            < durations[operation, None]):
+                    crossover[operation] = data.nbytes
+    
+    for operation, size in crossover.items():
+        print(
+            "{}: shared memory is faster from {}".format(
+                operation, 
+                "{} bytes".format(size) if size is not None else "(never)"))
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,7 @@ setuptools.setup(
     packages=["meg"],
     package_dir={"meg": "src/meg"},
     
-    python_requires=">=3.5",
+    python_requires=">=3.7",
     install_requires=["numpy"],
+    extras_require={"sparse": ["scipy"]},
 )
@@ -1,8 +1,19 @@
 import os
 import sys
 
-from . import converters, library
+from . import (
+    cache, converters, indexing, library, resources, shared_memory, startup)
+from .array import Array
+from .async_engine import AsyncEngine
+from .cache import memoize
 from .engine import Engine
+from .errors import MatlabError
+from .function import Function
+from .namespace import Namespace
+from .mat_file import MatFile
+from .parallel import map
+from .pool import EnginePool
+from .reference import Reference
 
 def setup(matlab_root=None):
     # NOTE the check for /bin/csh is mandatory, since opening the engine calls:
@@ -23,6 +34,15 @@ def setup(matlab_root=None):
     sys.modules[__name__].matlab_root = matlab_root
     from . import libmatrix
     from . import libengine
+    from . import libmat
+    
+    # Starting with R2018a, the real and imaginary parts of complex arrays may
+    # be interleaved, and the separate-storage API (mxGetImagData) requires a 
+    # conversion.
+    sys.modules[__name__].interleaved_complex = libmatrix.interleaved_complex
+
+# Set by `setup`
+interleaved_complex = False
 
 try:
     setup()
@@ -0,0 +1,67 @@
+import weakref
+
+class Array(object):
+    """ Handle on an mxArray.
+        
+        If the handle owns the array, it is destroyed when the handle is
+        closed, either explicitly, when leaving a with-block or when the
+        handle is garbage-collected. A borrowed handle (e.g. an element of a
+        cell array) never destroys the array, but keeps its owner alive.
+    """
+    
+    def __init__(self, pointer, owner=None):
+        self._pointer = pointer
+        self._owner = owner
+        if owner is None:
+            self._finalizer = weakref.finalize(self, _destroy, pointer)
+        else:
+            self._finalizer = None
+    
+    @property
+    def pointer(self):
+        """ Wrapped mxArray_p, None once the handle is closed or released.
+        """
+        return self._pointer
+    
+    @property
+    def owned(self):
+        return self._finalizer is not None and self._finalizer.alive
+    
+    @property
+    def _as_parameter_(self):
+        # Allow the handle to be passed directly to the MATLAB API functions.
+        if self._pointer is None:
+            raise ValueError("mxArray handle is closed")
+        return self._pointer
+    
+    def release(self):
+        """ Give up the ownership of the array (e.g. when it is stored in a
+            cell or a structure, which then become responsible for it) and
+            return the pointer.
+        """
+        
+        pointer = self._pointer
+        if self._finalizer is not None:
+            self._finalizer.detach()
+        self._pointer = None
+        return pointer
+    
+    def close(self):
+        """ Destroy the array if it is owned by the handle.
+        """
+        
+        if self._finalizer is not None:
+            self._finalizer()
+        self._pointer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+def _destroy(pointer):
+    # WARNING: the module must be imported *after* the setup has taken place.
+    from .libmatrix import mxDestroyArray
+    mxDestroyArray(pointer)
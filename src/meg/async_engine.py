@@ -0,0 +1,69 @@
+import asyncio
+
+from .engine import Engine
+
+class AsyncEngine(object):
+    """ asyncio front-end of an engine: the methods are coroutines, which
+        run the engine operations on the thread of the engine (cf. 
+        Engine.submit), without blocking the event loop. The operations are
+        queued, and run one at a time.
+        
+        The arguments of the constructor are those of Engine.
+        
+        >>> async with meg.AsyncEngine() as engine:
+        ...     await engine.put("x", 42)
+        ...     await engine.eval("y = 2*x")
+        ...     y = await engine.get("y")
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self.engine = Engine(*args, **kwargs)
+    
+    async def open(self):
+        await self._run(self.engine.open)
+    
+    async def close(self):
+        # Close from another thread, so that the thread of the engine is 
+        # stopped.
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.engine.close)
+    
+    @property
+    def is_open(self):
+        return self.engine.is_open
+    
+    async def eval(self, expression, *args, timeout=None):
+        """ cf. Engine.eval.
+        """
+        return await self._run(
+            self.engine.eval, expression, *args, timeout=timeout)
+    
+    async def get(self, name, index=None, copy=True):
+        """ cf. Engine.get.
+        """
+        return await self._run(self.engine.get, name, index, copy)
+    
+    async def put(self, name, value):
+        """ cf. Engine.put.
+        """
+        return await self._run(self.engine.put, name, value)
+    
+    async def call(self, function, *args, **kwargs):
+        """ cf. Engine.call.
+        """
+        return await self._run(self.engine.call, function, *args, **kwargs)
+    
+    async def _run(self, function, *args, **kwargs):
+        """ Run a function on the thread of the engine.
+        """
+        
+        return await asyncio.wrap_future(
+            self.engine.submit(function, *args, **kwargs))
+    
+    async def __aenter__(self):
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
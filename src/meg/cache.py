@@ -0,0 +1,348 @@
+""" Digests of Python values, used to detect unchanged values without 
+    converting them (cf. Engine.put), and caches of the results of MATLAB
+    functions (cf. Engine.call and memoize).
+"""
+
+import collections
+import functools
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+
+import numpy
+
+def digest(value):
+    """ Return a digest of a Python value which can be converted to MATLAB
+        (numpy arrays and scalars, strings, numbers, sequences, dictionaries
+        and sparse matrices), or None if the value cannot be digested.
+        
+        The digest covers the data, the type and the shape of arrays: equal 
+        values with different types have different digests.
+    """
+    
+    hasher = hashlib.blake2b(digest_size=16)
+    if not _update(hasher, value):
+        return None
+    return hasher.digest()
+
+def _update(hasher, value):
+    """ Add a value to a hash object, return False if the value cannot be 
+        digested.
+    """
+    
+    # NOTE: the type tags and the lengths prevent collisions between e.g. 
+    # ["ab"] and ["a", "b"].
+    sparse = sys.modules.get("scipy.sparse")
+    
+    if isinstance(value, (numpy.ndarray, numpy.generic)):
+        value = numpy.asarray(value)
+        if value.dtype.hasobject:
+            return False
+        if value.flags.f_contiguous and not value.flags.c_contiguous:
+            # Hash the transpose, which is C-contiguous, without copying
+            hasher.update(b"F")
+            value = value.T
+        else:
+            hasher.update(b"C")
+            value = numpy.ascontiguousarray(value)
+        hasher.update(
+            "{}{}".format(value.dtype.str, value.shape).encode())
+        hasher.update(value.reshape(-1).view(numpy.uint8).data)
+    elif isinstance(value, (bool, int, float, complex)):
+        hasher.update("{}:{!r};".format(type(value).__name__, value).encode())
+    elif isinstance(value, str):
+        value = value.encode()
+        hasher.update("s{};".format(len(value)).encode())
+        hasher.update(value)
+    elif isinstance(value, bytes):
+        hasher.update("b{};".format(len(value)).encode())
+        hasher.update(value)
+    elif isinstance(value, (list, tuple)):
+        hasher.update("l{};".format(len(value)).encode())
+        return all(_update(hasher, x) for x in value)
+    elif isinstance(value, dict):
+        hasher.update("d{};".format(len(value)).encode())
+        for key, item in value.items():
+            if not isinstance(key, str):
+                return False
+            _update(hasher, key)
+            if not _update(hasher, item):
+                return False
+    elif sparse is not None and sparse.issparse(value):
+        value = sparse.csc_matrix(value)
+        value.sort_indices()
+        hasher.update("S{}{};".format(value.dtype.str, value.shape).encode())
+        return all(
+            _update(hasher, x) 
+            for x in [value.data, value.indices, value.indptr])
+    else:
+        return False
+    
+    return True
+
+# Functions and commands which may modify any variable of the workspace
+_dynamic = {
+    "assignin", "clear", "clearvars", "eval", "evalc", "evalin", "load", "run"}
+
+def modified_names(expression):
+    """ Return the names of the variables which may be modified by a MATLAB 
+        expression, as a set, or None if any variable may be modified.
+        
+        This is a conservative approximation: all identifiers of the 
+        expression are considered modified, except for the names cleared by
+        `clear name1 name2 ...`. Scripts called by the expression are not
+        detected.
+    """
+    
+    names = set()
+    for statement in re.split(r"[;,\n]", expression):
+        identifiers = re.findall(r"[A-Za-z]\w*", statement)
+        if not identifiers:
+            continue
+        
+        # clear all, classes and java also clear all the variables
+        if identifiers[0] == "clear" and len(identifiers) > 1 and not re.search(
+                r"[*\-]|\b(all|classes|global|java|variables)\b", statement):
+            # Only the cleared variables are modified
+            names.update(identifiers[1:])
+        elif _dynamic.intersection(identifiers):
+            return None
+        else:
+            names.update(identifiers)
+    
+    return names
+
+def key(name, *args, **kwargs):
+    """ Return a key identifying a call to a function, from its name and the
+        digests of its arguments, or None if an argument cannot be digested.
+    """
+    
+    hasher = hashlib.blake2b(digest_size=16)
+    if not _update(hasher, [name, list(args), kwargs]):
+        return None
+    return hasher.hexdigest()
+
+class ResultCache(object):
+    """ Least-recently-used cache of function results, bounded by the total
+        size of the results (in bytes), and optionally persisted in a
+        directory.
+        
+        Numpy arrays in the results are made read-only, since they are shared
+        by all the calls which hit the cache. Only the results made of numeric
+        and logical arrays and scalars are persisted, as .npz files.
+    """
+    
+    def __init__(self, max_size=2**28, directory=None):
+        self.max_size = max_size
+        self.directory = directory
+        
+        self.hits = 0
+        self.misses = 0
+        
+        self._results = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+    
+    @property
+    def size(self):
+        """ Total size of the results in memory.
+        """
+        return self._size
+    
+    def get(self, key, default=None):
+        """ Return a cached result, or default if the key is not cached.
+        """
+        
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key][0]
+        
+        value = self._load(key) if self.directory is not None else _missing
+        with self._lock:
+            if value is _missing:
+                self.misses += 1
+                return default
+            self.hits += 1
+        self._store(key, value)
+        return value
+    
+    def put(self, key, value):
+        """ Cache a result, evicting the least-recently-used results if the
+            cache is full.
+        """
+        
+        _freeze(value)
+        self._store(key, value)
+        if self.directory is not None:
+            self._save(key, value)
+    
+    def clear(self):
+        """ Remove all results from memory and from the directory.
+        """
+        
+        with self._lock:
+            self._results.clear()
+            self._size = 0
+        if self.directory is not None:
+            for entry in os.listdir(self.directory):
+                if entry.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, entry))
+    
+    def __contains__(self, key):
+        return (
+            key in self._results 
+            or (
+                self.directory is not None 
+                and os.path.exists(self._path(key))))
+    
+    def __len__(self):
+        return len(self._results)
+    
+    def _store(self, key, value):
+        """ Store a result in memory, evicting the least-recently-used
+            results.
+        """
+        
+        size = _size(value)
+        if size > self.max_size:
+            return
+        
+        with self._lock:
+            if key in self._results:
+                self._size -= self._results.pop(key)[1]
+            self._results[key] = (value, size)
+            self._size += size
+            while self._size > self.max_size:
+                _, (_, evicted) = self._results.popitem(last=False)
+                self._size -= evicted
+    
+    def _path(self, key):
+        return os.path.join(self.directory, "{}.npz".format(key))
+    
+    def _save(self, key, value):
+        """ Save a result in the directory, if it contains only numeric and
+            logical values.
+        """
+        
+        items = value if isinstance(value, tuple) else (value,)
+        if not all(
+                isinstance(x, (numpy.ndarray, numpy.generic)) 
+                and x.dtype.kind in "biufc" for x in items):
+            return
+        
+        arrays = {"item_{}".format(i): x for i, x in enumerate(items)}
+        arrays["tuple"] = isinstance(value, tuple)
+        arrays["scalars"] = [isinstance(x, numpy.generic) for x in items]
+        
+        # Write the file atomically, so that concurrent readers never see a 
+        # partial file.
+        descriptor, path = tempfile.mkstemp(".npz", dir=self.directory)
+        try:
+            with os.fdopen(descriptor, "wb") as fd:
+                numpy.savez(fd, **arrays)
+            os.replace(path, self._path(key))
+        except:
+            os.remove(path)
+            raise
+    
+    def _load(self, key):
+        """ Load a result from the directory, return _missing if it was not
+            saved.
+        """
+        
+        try:
+            with numpy.load(self._path(key)) as data:
+                scalars = data["scalars"]
+                items = [
+                    data["item_{}".format(i)][()] if scalar 
+                    else data["item_{}".format(i)]
+                    for i, scalar in enumerate(scalars)]
+                is_tuple = bool(data["tuple"])
+        except FileNotFoundError:
+            return _missing
+        
+        _freeze(items)
+        return tuple(items) if is_tuple else items[0]
+
+def memoize(function=None, *, max_size=2**28, directory=None):
+    """ Cache the results of a function which depends only on its arguments 
+        (e.g. a function calling MATLAB), keyed on its name and on the digests
+        of its arguments (cf. ResultCache). Engine arguments are not part of
+        the key; calls with arguments which cannot be digested (e.g. 
+        references) are not cached.
+        
+        The cache of the decorated function is available as its `cache`
+        attribute.
+        
+        >>> @meg.memoize(directory="filters")
+        ... def design(engine, order, cutoff):
+        ...     return engine.call("fir1", order, cutoff)
+    """
+    
+    if function is None:
+        return functools.partial(
+            memoize, max_size=max_size, directory=directory)
+    
+    results = ResultCache(max_size, directory)
+    name = "{}.{}".format(function.__module__, function.__qualname__)
+    
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        from .engine import Engine
+        
+        key_ = key(
+            name, *[x for x in args if not isinstance(x, Engine)], 
+            **{k: v for k, v in kwargs.items() if not isinstance(v, Engine)})
+        if key_ is None:
+            return function(*args, **kwargs)
+        
+        result = results.get(key_, _missing)
+        if result is _missing:
+            result = function(*args, **kwargs)
+            results.put(key_, result)
+        return result
+    
+    wrapper.cache = results
+    return wrapper
+
+def _freeze(value):
+    """ Make the numpy arrays of a value read-only.
+    """
+    
+    if isinstance(value, numpy.ndarray):
+        value.flags.writeable = False
+        if value.dtype.hasobject:
+            for item in value.flat:
+                _freeze(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+
+def _size(value):
+    """ Approximate size of a value, in bytes.
+    """
+    
+    if isinstance(value, numpy.ndarray):
+        size = value.nbytes
+        if value.dtype.hasobject:
+            size += sum(_size(x) for x in value.flat)
+        return size
+    elif isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size(x) for x in value)
+    elif isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(x) for x in value.values())
+    else:
+        return sys.getsizeof(value)
+
+_missing = object()
@@ -1,18 +1,31 @@
+import contextlib
 import ctypes
+import sys
+
 import numpy
 
-def to_python(source):
+from .array import Array
+
+def to_python(source, copy=True):
+    """ Convert an mxArray (either as an Array handle or as a raw pointer) to
+        a Python object. The source array is not modified nor destroyed. 
+        Arrays which cannot be converted are returned as-is.
+        
+        If copy is False, real and logical arrays are returned as views of the
+        mxArray data. When the source is an Array handle, the views keep it
+        alive, and the mxArray is destroyed only once all views are collected.
+    """
+    
     # WARNING: the module must be imported *after* the setup has taken place.
     from .libmatrix import (
-        ClassID, mxArray_p, mxArrayToString, mxGetCell, mxGetClassID, mxGetData, 
-        mxGetDimensions, mxGetElementSize, mxGetFieldByNumber, 
-        mxGetFieldNameByNumber, mxGetImagData, mxGetLogicals, 
+        ClassID, mxArray_p, mxArrayToString, mxFree, mxGetCell, mxGetClassID, 
+        mxGetData, mxGetDimensions, mxGetFieldByNumber, mxGetFieldNameByNumber, 
         mxGetNumberOfDimensions, mxGetNumberOfElements, mxGetNumberOfFields,
         mxIsCell, mxIsChar, mxIsComplex, mxIsLogical, mxIsNumeric, mxIsScalar, 
-        mxIsStruct)
+        mxIsSparse, mxIsStruct)
     
     # Only convert mxArray objects
-    if not isinstance(source, mxArray_p):
+    if not isinstance(source, (Array, mxArray_p)):
         return source
     
     # Get the type of the array, return as-is if unknown
@@ -34,50 +47,43 @@ def to_python(source):
     # Get the shape of the array
     shape = mxGetDimensions(source)[:mxGetNumberOfDimensions(source)]
     
-    # Get the buffer size
+    # Empty arrays have no data
     count = mxGetNumberOfElements(source)
-    element_size = mxGetElementSize(source)
-    buffer_size = count*element_size
     
-    if mxIsNumeric(source):
+    if mxIsSparse(source):
+        # Sparse arrays are either double or logical
+        result = _sparse_to_python(source, class_id, shape, dtype, copy)
+    elif mxIsNumeric(source):
         # https://www.mathworks.com/help/matlab/apiref/mxisnumeric.html
         # Covers DOUBLE, SINGLE, INT* and UINT*
         
-        # Build numpy array of real part
-        real_data = mxGetData(source)
-        real_buffer = ctypes.create_string_buffer(buffer_size)
-        ctypes.memmove(real_buffer, real_data, buffer_size)
-        
-        result = numpy.ndarray(shape, dtype, real_buffer, order="F")
-
         if mxIsComplex(source):
-            # Build numpy array of imaginary part
-            
-            imaginary_data = mxGetImagData(source)
-            imaginary_buffer = ctypes.create_string_buffer(buffer_size)
-            ctypes.memmove(imaginary_buffer, imaginary_data, buffer_size)
-            
-            result = (
-                result 
-                + 1j*numpy.ndarray(shape, dtype, imaginary_buffer, order="F"))
+            result = _complex_to_python(source, class_id, shape, dtype, copy)
+        elif count == 0:
+            result = numpy.empty(shape, dtype, order="F")
+        else:
+            result = _wrap(source, mxGetData(source), shape, dtype, copy)
         
         if mxIsScalar(source):
             result = result.ravel()[0]
     elif mxIsChar(source):
-        result = mxArrayToString(source).decode()
+        string = mxArrayToString(source)
+        try:
+            result = ctypes.string_at(string).decode()
+        finally:
+            mxFree(string)
     elif mxIsLogical(source):
-        data = mxGetLogicals(source)
-        buffer_ = ctypes.create_string_buffer(buffer_size)
-        ctypes.memmove(buffer_, data, buffer_size)
-        
-        result = numpy.ndarray(shape, dtype, buffer_, order="F")
+        if count == 0:
+            result = numpy.empty(shape, dtype, order="F")
+        else:
+            result = _wrap(source, mxGetData(source), shape, dtype, copy)
         if mxIsScalar(source):
             result = result.ravel()[0]
     elif mxIsCell(source):
         result = numpy.ndarray(shape, dtype)
         for index, location in enumerate(numpy.ndindex(result.shape[::-1])): 
             item = mxGetCell(source, index)
-            result[location[::-1]] = to_python(item)
+            result[location[::-1]] = _to_python_item(item, source, copy)
     elif mxIsStruct(source):
         fields = [
             mxGetFieldNameByNumber(source, x) 
@@ -88,7 +94,8 @@ def to_python(source):
             for field_index, field in enumerate(fields):
                 item = mxGetFieldByNumber(source, location_index, field_index)
                 # FIXME: crashes when the item is empty
-                result[location[::-1]][field_index] = to_python(item)
+                result[location[::-1]][field_index] = _to_python_item(
+                    item, source, copy)
         if mxIsScalar(source):
             result = dict(zip(result.dtype.names, result.ravel()[0]))
     else:
@@ -96,15 +103,210 @@ def to_python(source):
     
     return result
 
+def _complex_to_python(source, class_id, shape, dtype, copy):
+    """ Convert a complex numeric mxArray to a numpy array. Complex integers
+        are converted to complex128.
+    """
+    
+    # WARNING: the module must be imported *after* the setup has taken place.
+    from . import interleaved_complex, libmatrix
+    
+    complex_dtype = (
+        numpy.complex64 if dtype is numpy.single else numpy.complex128)
+    
+    if libmatrix.mxGetNumberOfElements(source) == 0:
+        return numpy.empty(shape, complex_dtype, order="F")
+    
+    if interleaved_complex:
+        # R2018a and later: real and imaginary parts are interleaved, which is
+        # the layout of numpy complex arrays.
+        getter = getattr(
+            libmatrix, 
+            "mxGetComplex{}s".format(libmatrix.ClassID(class_id).name.title()))
+        data = ctypes.cast(getter(source), ctypes.c_void_p).value
+        if dtype in [numpy.single, numpy.double]:
+            return _wrap(source, data, shape, complex_dtype, copy)
+        else:
+            parts = _wrap(
+                source, data, shape, [("real", dtype), ("imag", dtype)], False)
+            real, imaginary = parts["real"], parts["imag"]
+    else:
+        real = _wrap(source, libmatrix.mxGetData(source), shape, dtype, False)
+        imaginary = _wrap(
+            source, libmatrix.mxGetImagData(source), shape, dtype, False)
+    
+    result = numpy.empty(shape, complex_dtype, order="F")
+    result.real = real
+    result.imag = imaginary
+    return result
+
+def _wrap(source, data, shape, dtype, copy):
+    """ Wrap the data of an mxArray in a Fortran-ordered numpy array. If copy 
+        is False, the array is a view on the data and keeps the source alive.
+    """
+    
+    size = int(numpy.prod(shape))*numpy.dtype(dtype).itemsize
+    buffer_ = (ctypes.c_char*size).from_address(data)
+    result = numpy.ndarray(shape, dtype, buffer_, order="F")
+    if copy:
+        result = result.copy(order="F")
+    else:
+        # The view keeps a reference to its buffer, which in turn keeps the
+        # mxArray alive
+        buffer_.source = source
+    return result
+
+def _fill(target, data, source):
+    """ Copy a numpy array to the Fortran-ordered data of an mxArray.
+    """
+    
+    _wrap(target, data, source.shape, source.dtype, False)[...] = source
+
+def _fill_numeric(target, source):
+    """ Copy a real or complex numpy array to the data of a numeric mxArray.
+    """
+    
+    # WARNING: the module must be imported *after* the setup has taken place.
+    from . import interleaved_complex, libmatrix
+    
+    # Copy the source once, from its own strides to views of the mxArray
+    # data. The real and imaginary parts of complex arrays are views.
+    if source.size == 0:
+        return
+    elif source.dtype.kind == "c" and interleaved_complex:
+        # R2018a and later: same layout as numpy complex arrays
+        getter = (
+            libmatrix.mxGetComplexSingles if source.dtype == numpy.complex64
+            else libmatrix.mxGetComplexDoubles)
+        _fill(
+            target, ctypes.cast(getter(target), ctypes.c_void_p).value, source)
+    else:
+        _fill(target, libmatrix.mxGetData(target), source.real)
+        if source.dtype.kind == "c":
+            _fill(target, libmatrix.mxGetImagData(target), source.imag)
+
+def _sparse_to_python(source, class_id, shape, dtype, copy):
+    """ Convert a sparse mxArray to a scipy.sparse.csc_matrix. Since MATLAB
+        also uses the compressed sparse column format, no reordering is 
+        needed, and the matrix may be a view on the data of the source.
+    """
+    
+    import scipy.sparse
+    
+    # WARNING: the module must be imported *after* the setup has taken place.
+    from . import libmatrix
+    
+    # mwIndex is unsigned, but scipy requires signed indices
+    index_dtype = numpy.dtype("i{}".format(ctypes.sizeof(libmatrix.mwIndex)))
+    
+    def address(pointer):
+        return ctypes.cast(pointer, ctypes.c_void_p).value
+    
+    rows, columns = shape
+    jc = _wrap(
+        source, address(libmatrix.mxGetJc(source)), [columns+1], index_dtype,
+        copy)
+    count = int(jc[-1])
+    ir = _wrap(
+        source, address(libmatrix.mxGetIr(source)), [count], index_dtype, copy)
+    if libmatrix.mxIsComplex(source):
+        data = _complex_to_python(source, class_id, [count], dtype, copy)
+    else:
+        data = _wrap(source, libmatrix.mxGetData(source), [count], dtype, copy)
+    
+    # NOTE: the csc_matrix constructor may change the type of the indices,
+    # set the members directly to avoid copies. The shape must be a tuple, a
+    # list is read as dense data.
+    result = scipy.sparse.csc_matrix((rows, columns), dtype=data.dtype)
+    result.data, result.indices, result.indptr = data, ir, jc
+    # MATLAB sparse arrays have sorted indices and no duplicates
+    result.has_canonical_format = True
+    
+    return result
+
+def _sparse_to_matlab(source):
+    """ Convert a scipy.sparse matrix to a sparse mxArray. Only double and
+        logical sparse arrays exist in MATLAB: other types are converted to 
+        double.
+    """
+    
+    # WARNING: the module must be imported *after* the setup has taken place.
+    from . import libmatrix
+    from .libmatrix import Complexity
+    
+    matrix = source.tocsc()
+    if not matrix.has_canonical_format:
+        matrix = matrix.copy()
+        matrix.sum_duplicates()
+    
+    rows, columns = matrix.shape
+    count = matrix.nnz
+    if matrix.dtype == bool:
+        result = Array(libmatrix.mxCreateSparseLogicalMatrix(
+            rows, columns, max(count, 1)))
+        data = matrix.data[:count]
+    else:
+        complexity = (
+            Complexity.COMPLEX if matrix.dtype.kind == "c" 
+            else Complexity.REAL)
+        result = Array(libmatrix.mxCreateSparse(
+            rows, columns, max(count, 1), complexity))
+        data = matrix.data[:count].astype(
+            numpy.complex128 if complexity else numpy.double, copy=False)
+    
+    index_dtype = numpy.dtype("u{}".format(ctypes.sizeof(libmatrix.mwIndex)))
+    for getter, indices in [
+            (libmatrix.mxGetJc, matrix.indptr), 
+            (libmatrix.mxGetIr, matrix.indices[:count])]:
+        view = _wrap(
+            result, ctypes.cast(getter(result), ctypes.c_void_p).value, 
+            indices.shape, index_dtype, False)
+        view[...] = indices
+    
+    if matrix.dtype == bool:
+        _fill(result, libmatrix.mxGetData(result), data)
+    else:
+        _fill_numeric(result, data)
+    
+    return result
+
+def _to_python_item(item, container, copy):
+    """ Convert an element of a cell or a structure: since the element is 
+        owned by its container, unconverted elements are duplicated.
+    """
+    
+    # WARNING: the module must be imported *after* the setup has taken place.
+    from .libmatrix import mxDuplicateArray
+    
+    if isinstance(container, Array):
+        # Views on the element must keep its container alive
+        item = Array(item, container)
+    result = to_python(item, copy)
+    if result is item:
+        result = Array(mxDuplicateArray(item))
+    return result
+
 def to_matlab(source):
+    """ Convert a Python object to a new mxArray, returned as an owning Array
+        handle.
+    """
+    
     # WARNING: the module must be imported *after* the setup has taken place.
+    from . import libmatrix
     from .libmatrix import (
         ClassID, Complexity, 
         mwSize, mxAddField, mxCreateCellArray, mxCreateLogicalArray, 
-        mxCreateNumericArray, mxCreateString, mxCreateStructArray, mxGetData, 
-        mxGetImagData, mxSetCell, mxSetField)
+        mxCreateString, mxCreateStructArray, mxGetData, mxSetCell, mxSetField)
+    
+    # Only check for sparse matrices if scipy.sparse is used
+    sparse = sys.modules.get("scipy.sparse")
+    if sparse is not None and sparse.issparse(source):
+        return _sparse_to_matlab(source)
     
-    array = numpy.array(source, ndmin=2)
+    # Same as numpy.array(source, ndmin=2), without copying existing arrays
+    array = numpy.asarray(source)
+    if array.ndim < 2:
+        array = array.reshape((1,)*(2-array.ndim)+array.shape)
     kind = array.dtype.kind
     numbers = ["i", "u", "f", "c"]
     
@@ -121,46 +323,64 @@ def to_matlab(source):
         
         complexity = Complexity.COMPLEX if kind == "c" else Complexity.REAL
         
-        result = mxCreateNumericArray(
-            array.ndim, array.ctypes.shape_as(mwSize), class_id, complexity)
+        # The array is fully overwritten, skip the zero-filling if possible
+        # (mxCreateUninitNumericArray requires R2015a)
+        create = getattr(
+            libmatrix, "mxCreateUninitNumericArray", 
+            libmatrix.mxCreateNumericArray)
+        result = Array(create(
+            array.ndim, array.ctypes.shape_as(mwSize), class_id, complexity))
         
-        data = mxGetData(result)
-        buffer_ = array.real.tobytes("F")
-        ctypes.memmove(data, buffer_, len(buffer_))
-
-        if complexity:
-            data = mxGetImagData(result)
-            buffer_ = array.imag.tobytes("F")
-            ctypes.memmove(data, buffer_, len(buffer_))
+        _fill_numeric(result, array)
     elif isinstance(source, bytes):
-        result = mxCreateString(source)
+        result = Array(mxCreateString(source))
     elif isinstance(source, str):
-        result = mxCreateString(source.encode())
+        result = Array(mxCreateString(source.encode()))
     elif kind == "b":
-        result = mxCreateLogicalArray(array.ndim, array.ctypes.shape_as(mwSize))
-        data = mxGetData(result)
-        buffer_ = array.real.tobytes("F")
-        ctypes.memmove(data, buffer_, len(buffer_))
+        result = Array(
+            mxCreateLogicalArray(array.ndim, array.ctypes.shape_as(mwSize)))
+        if array.size != 0:
+            _fill(result, mxGetData(result), array)
     elif isinstance(source, dict) or array.dtype.names:
-        result = mxCreateStructArray(
-            array.ndim, array.ctypes.shape_as(mwSize), 0, None)
-        if isinstance(source, dict):
-            for name, value in source.items():
-                mxAddField(result, name.encode())
-                mxSetField(result, 0, name.encode(), to_matlab(value))
-        else:
-            for name in array.dtype.names:
-                mxAddField(result, name.encode())
+        result = Array(mxCreateStructArray(
+            array.ndim, array.ctypes.shape_as(mwSize), 0, None))
+        # NOTE: the fields and cells take ownership of their content, the
+        # partially-filled array is destroyed if a conversion fails.
+        with _destroy_on_error(result):
+            if isinstance(source, dict):
+                for name, value in source.items():
+                    mxAddField(result, name.encode())
+                    mxSetField(
+                        result, 0, name.encode(), to_matlab(value).release())
+            else:
+                for name in array.dtype.names:
+                    mxAddField(result, name.encode())
+                for index, location in enumerate(
+                        numpy.ndindex(array.shape[::-1])):
+                    item = array[location[::-1]]
+                    for name, value in zip(array.dtype.names, item):
+                        mxSetField(
+                            result, index, name.encode(), 
+                            to_matlab(value).release())
+    elif kind == "O":
+        result = Array(
+            mxCreateCellArray(array.ndim, array.ctypes.shape_as(mwSize)))
+        with _destroy_on_error(result):
             for index, location in enumerate(numpy.ndindex(array.shape[::-1])):
                 item = array[location[::-1]]
-                for name, value in zip(array.dtype.names, item):
-                    mxSetField(result, index, name.encode(), to_matlab(value))
-    elif kind == "O":
-        result = mxCreateCellArray(array.ndim, array.ctypes.shape_as(mwSize))
-        for index, location in enumerate(numpy.ndindex(array.shape[::-1])):
-            item = array[location[::-1]]
-            mxSetCell(result, index, to_matlab(item))
+                mxSetCell(result, index, to_matlab(item).release())
     else:
-        raise NotImplementedError("Cannot convert {}".format(src))
+        raise NotImplementedError("Cannot convert {}".format(source))
     
     return result
+
+@contextlib.contextmanager
+def _destroy_on_error(array):
+    """ Close an Array handle if an exception is raised in a with-block.
+    """
+    
+    try:
+        yield array
+    except:
+        array.close()
+        raise
@@ -1,51 +1,820 @@
-from . import converters
+import concurrent.futures
+import ctypes
+import hashlib
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy
+
+from . import (
+    cache, converters, indexing, resources, shared_memory, startup)
+from .array import Array
+from .errors import MatlabError
+from .function import Function
+from .namespace import Namespace
+from .reference import Reference
 
 class Engine(object):
-    def __init__(self, command=None):
+    """ Connection to a MATLAB engine.
+        
+        If single_use is True, the engine is started with engOpenSingleUse,
+        and is not shared with other clients.
+        
+        The profile gives the command-line options of MATLAB, either by name
+        or as a list (cf. startup.profiles). If warm_up is not None, it is
+        called with the engine once it is open (cf. startup.warm_up). The 
+        duration of the start-up phases are stored in startup_times.
+        
+        The number of computational threads of MATLAB is set to threads; if
+        threads is None, the cores of the host are divided evenly across the
+        live engines (cf. resources). If affinity is not None, it is the list
+        of CPUs which MATLAB may use (this requires the taskset command), and
+        threads defaults to its length. Profiles using -singleCompThread
+        have one thread.
+        
+        If shared_memory_threshold is not None, numeric arrays of at least 
+        this size (in bytes) are transferred through files in shared memory
+        instead of the engine channel, cf. the shared_memory module.
+        
+        The output of the evaluated expressions is captured in a buffer of
+        output_size bytes, which grows when the output is larger, and passed
+        to output_callback if it is not None.
+        
+        If put_cache is True, the engine remembers a digest of the values
+        stored by put, and skips the transfer of unchanged values. The 
+        digests are invalidated by the MATLAB expressions which may modify 
+        the variables (cf. cache.modified_names), or explicitly by
+        invalidate.
+    """
+    
+    def __init__(
+            self, command=None, single_use=False, 
+            shared_memory_threshold=None, put_cache=False, 
+            result_cache=None, output_size=2**16, output_callback=None,
+            profile=None, warm_up=None, threads=None, affinity=None):
         # WARNING: the module must be imported *after* the setup has taken place.
         from .import libengine
         self.libengine = libengine
         
         self._command = None
         self._engine = None
+        self._output = None
         
         self.command = command
+        self.single_use = single_use
+        self.profile = profile
+        self.warm_up = warm_up
+        self.affinity = affinity
+        if threads is None:
+            # Do not use more threads than CPUs, or override the profile
+            if affinity is not None:
+                threads = len(affinity)
+            elif "-singleCompThread" in startup.options(profile):
+                threads = 1
+        self.threads = threads
+        
+        # Number of computational threads of MATLAB
+        self.compute_threads = None
+        self.shared_memory_threshold = shared_memory_threshold
+        self.put_cache = put_cache
+        
+        # Digests of the values stored by put, by variable name
+        self._digests = {}
+        
+        # Cache of the results of Engine.call, created on first use
+        self.result_cache = result_cache
+        
+        self.output_size = output_size
+        self.output_callback = output_callback
+        
+        # Directory of the compiled functions, created on first use, and 
+        # functions by hash of their source
+        self._functions_directory = None
+        self._functions = {}
+        
+        # Process identifier of MATLAB, and thread running the evaluations 
+        # with a timeout, created on first use
+        self.pid = None
+        self._executor = None
+        
+        # Number of evaluations which timed out, and of restarts of the engine
+        self.timeouts = 0
+        self.restarts = 0
+        
+        # Thread running the engine commands, created on first use, and its
+        # identifier
+        self._worker = None
+        self._worker_id = None
+        self._lock = threading.Lock()
+        
+        # Variables of garbage-collected references, cleared before the next
+        # command (cf. Reference)
+        self._pending_clears = []
+        
+        # Start-up running in the background, and duration of its phases
+        self._opening = None
+        self.startup_times = {}
     
     def __del__(self):
-        if self._engine is not None:
-            self.close()
+        if getattr(self, "_engine", None) is not None:
+            # No command is queued, since they keep the engine alive: close
+            # it directly, the worker may not accept commands anymore (e.g.
+            # at interpreter exit).
+            try:
+                self._close()
+            finally:
+                self._stop_worker()
+    
+    def open(self, background=False):
+        """ Start the engine. If background is True, return immediately: the
+            commands are queued until the engine is started, cf. ready.
+        """
+        
+        if background:
+            self._opening = self.submit(self._open)
+        else:
+            self._execute(self._open)
+    
+    def ready(self, timeout=None):
+        """ Wait at most timeout seconds (or forever if timeout is None) for
+            the engine to be started, and return whether it is. Errors raised
+            while starting the engine are raised here.
+        """
+        
+        if self._opening is not None:
+            try:
+                self._opening.result(timeout)
+            except concurrent.futures.TimeoutError:
+                return False
+        return self.is_open
+    
+    def _open(self):
+        times = {}
+        start = time.perf_counter()
+        
+        self._digests = {}
+        command = self._startup_command()
+        if self.single_use:
+            status = ctypes.c_int()
+            engine = self.libengine.engOpenSingleUse(
+                command, None, ctypes.byref(status))
+        else:
+            engine = self.libengine.engOpen(command)
+        times["start"] = time.perf_counter()-start
+        
+        self._engine = engine
+        self._set_output_buffer(self.output_size)
+        self.pid = int(self._query("fprintf('%d', feature('getpid'));"))
+        if self.threads is not None:
+            self._set_threads(self.threads)
+        resources.register(self)
+        times["setup"] = time.perf_counter()-start-times["start"]
+        
+        if self.warm_up is not None:
+            self.warm_up(self)
+            times["warm_up"] = (
+                time.perf_counter()-start-times["start"]-times["setup"])
+        
+        times["total"] = time.perf_counter()-start
+        self.startup_times = times
+    
+    def _startup_command(self):
+        """ Command starting MATLAB, with the options of the profile.
+        """
+        
+        options = startup.options(self.profile)
+        if not options and self.affinity is None:
+            return self.command
+        
+        if self.command is not None:
+            command = [self.command.decode()]
+        else:
+            from meg import matlab_root
+            command = [os.path.join(matlab_root, "bin", "matlab")]
+        if self.affinity is not None:
+            command = [
+                "taskset", "-c", ",".join(str(x) for x in self.affinity)
+            ] + command
+        return " ".join(command+options).encode()
     
-    def open(self):
-        self._engine = self.libengine.engOpen(self.command)
+    def _set_threads(self, count):
+        """ Set the number of computational threads of MATLAB.
+        """
+        
+        self._query("maxNumCompThreads({});".format(count))
+        self.compute_threads = count
     
     def close(self):
-        self.libengine.engClose(self._engine)
-        self._engine = None
+        # Unregister before the worker stops, since re-balancing the threads
+        # submits commands to the engines.
+        resources.unregister(self)
+        try:
+            if threading.get_ident() == self._worker_id:
+                self._run(self._close)
+            else:
+                try:
+                    future = self.submit(self._close)
+                except RuntimeError:
+                    # The worker does not accept commands anymore, e.g. at
+                    # interpreter exit
+                    self._close()
+                else:
+                    future.result()
+        finally:
+            # The worker is kept if the engine is closed by one of its
+            # commands, e.g. when restarting.
+            if threading.get_ident() != self._worker_id:
+                self._stop_worker()
     
-    def eval(self, expression):
-        self.libengine.engEvalString(self._engine, expression.encode())
+    def _stop_worker(self):
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.shutdown(wait=False)
     
-    def __call__(self, expression):
-        return self.eval(expression)
+    def _close(self):
+        try:
+            self.libengine.engClose(self._engine)
+        finally:
+            # Do not try to close a dead engine twice
+            self._engine = None
+            self._output = None
+            self._opening = None
+            self._pending_clears = []
+            self.pid = None
+            self.compute_threads = None
+            
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            
+            if self._functions_directory is not None:
+                shutil.rmtree(self._functions_directory, ignore_errors=True)
+                self._functions_directory = None
+            self._functions = {}
     
-    def get(self, name):
-        return converters.to_python(
-            self.libengine.engGetVariable(self._engine, name.encode()))
+    @property
+    def is_open(self):
+        return self._engine is not None
+    
+    def submit(self, function, *args, **kwargs):
+        """ Schedule a function to be run on the thread of the engine, after
+            the commands which are already queued, and return a
+            concurrent.futures.Future. The engine methods called by the 
+            function run without being queued.
+        """
+        
+        with self._lock:
+            if self._worker is None:
+                self._worker = concurrent.futures.ThreadPoolExecutor(1)
+                self._worker_id = self._worker.submit(
+                    threading.get_ident).result()
+            return self._worker.submit(
+                self._run, function, *args, **kwargs)
+    
+    def _execute(self, function, *args):
+        """ Run a function on the thread of the engine, and return its 
+            result. All accesses to the MATLAB engine go through this 
+            function, so that the engine can be shared between threads.
+        """
+        
+        if threading.get_ident() == self._worker_id:
+            return self._run(function, *args)
+        else:
+            return self.submit(function, *args).result()
+    
+    def _run(self, function, *args, **kwargs):
+        """ Run a function on the thread of the engine, after clearing the
+            pending variables.
+        """
+        
+        if self._pending_clears and self._engine is not None:
+            names = []
+            # NOTE: pop is atomic, references may be collected meanwhile
+            while self._pending_clears:
+                names.append(self._pending_clears.pop())
+            self.invalidate(names)
+            # Errors are ignored, the variables may already be cleared
+            self._evaluate("clear {}".format(" ".join(names)))
+        return function(*args, **kwargs)
+    
+    def eval(self, expression, *args, timeout=None):
+        """ Evaluate a MATLAB expression, and return its output. If args are
+            given, the expression is first formatted with them (cf. 
+            str.format): references are then replaced by the name of their
+            variable.
+            
+            Errors raised by the expression are reported in the output, in the
+            same round-trip, and raised as MatlabError.
+            
+            If timeout is not None and the evaluation lasts more than timeout
+            seconds, the MATLAB process is killed and the engine is restarted
+            (its workspace is then lost), and TimeoutError is raised. This
+            requires MATLAB to run on the local host.
+        """
+        
+        if args:
+            expression = expression.format(*args)
+        if self._digests:
+            self.invalidate(cache.modified_names(expression))
+        
+        if timeout is None:
+            output, record = self._execute(self._evaluate, expression)
+        else:
+            output, record = self._execute(
+                self._evaluate_with_timeout, expression, timeout)
+        
+        if output and self.output_callback is not None:
+            self.output_callback(output)
+        
+        if record is not None:
+            raise _error(record)
+        
+        return output
+    
+    def _query(self, expression):
+        """ Evaluate a MATLAB expression and return its output, without 
+            passing it to the output callback: used by the internal commands
+            whose output is a result.
+        """
+        
+        output, record = self._execute(self._evaluate, expression)
+        if record is not None:
+            raise _error(record)
+        return output
+    
+    def restart(self):
+        """ Close the engine, even if it died, and open it again.
+        """
+        
+        try:
+            self.close()
+        except RuntimeError:
+            # Already dead
+            pass
+        self.open()
+        self.restarts += 1
+    
+    def _evaluate_with_timeout(self, expression, timeout):
+        """ Evaluate a MATLAB expression on a separate thread, and restart the
+            engine if the evaluation times out, cf. eval.
+        """
+        
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(1)
+        future = self._executor.submit(self._evaluate, expression)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.timeouts += 1
+            os.kill(self.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            # Wait for engEvalString to fail before closing the engine
+            concurrent.futures.wait([future])
+            self.restart()
+            raise TimeoutError(
+                "MATLAB evaluation timed out after {} s".format(timeout))
+    
+    def _evaluate(self, expression):
+        """ Evaluate a MATLAB expression, return its output and its error 
+            record (None if no error was raised).
+        """
+        
+        self._check_open()
+        
+        # The error record and the end marker are printed after the output
+        self.libengine.engEvalString(
+            self._engine, _wrapper.format(expression).encode())
+        output = self._output.value.decode(errors="replace")
+        
+        truncated = (len(self._output.value) == len(self._output)-1)
+        if truncated:
+            # The end of the output is lost, including the error record: grow
+            # the buffer for the next calls, and query the error status. The
+            # partial output is kept.
+            error = output.find(_separator)
+            if error != -1:
+                output = output[:error]
+            self._set_output_buffer(2*len(self._output))
+            self.libengine.engEvalString(self._engine, _status.encode())
+            record = self._output.value.decode(errors="replace")
+            record = record.split(_separator) if record else None
+        else:
+            end = output.rfind(_end)
+            if end == -1:
+                # The expression could not be parsed: only the error message
+                # is printed
+                output, record = "", ["", "", output.strip()]
+            else:
+                output, record = output[:end], None
+                error = output.find(_separator)
+                if error != -1:
+                    output, record = (
+                        output[:error], output[error:].split(_separator))
+        
+        return output, record
+    
+    def __call__(self, expression, *args, timeout=None):
+        return self.eval(expression, *args, timeout=timeout)
+    
+    def call(self, function, *args, nargout=1, fetch=True, cache=False):
+        """ Call a MATLAB function and return its outputs: a single output is
+            returned as-is, several outputs as a tuple, and no output as None.
+            
+            The arguments are stored in temporary variables, except for
+            references which are used directly. If fetch is True, the outputs
+            are transferred to Python; otherwise owning references to the 
+            outputs are returned, and the data stays in MATLAB. Temporary 
+            variables are cleared after the call.
+            
+            If cache is True (or a cache.ResultCache), the function is assumed
+            to depend only on its arguments, and the fetched outputs are 
+            cached, keyed on the function name and on the digests of the
+            arguments. By default, the engine's result_cache is used.
+        """
+        
+        if cache is not False and fetch:
+            return self._cached_call(cache, function, args, nargout)
+        
+        inputs = []
+        temporaries = []
+        outputs = self.temporary_names(nargout)
+        if fetch:
+            temporaries.extend(outputs)
+        else:
+            results = tuple(Reference(self, x, True) for x in outputs)
+        try:
+            for value in args:
+                if isinstance(value, Reference):
+                    inputs.append(value.name)
+                else:
+                    name, = self.temporary_names(1)
+                    temporaries.append(name)
+                    self.put(name, value)
+                    inputs.append(name)
+            self.eval("{}{}({});".format(
+                "[{}] = ".format(", ".join(outputs)) if outputs else "",
+                function, ", ".join(inputs)))
+            if fetch:
+                results = tuple(self.get(x) for x in outputs)
+        finally:
+            if temporaries:
+                self.eval("clear {}".format(" ".join(temporaries)))
+        
+        if nargout == 0:
+            return None
+        elif nargout == 1:
+            return results[0]
+        else:
+            return results
+    
+    def _cached_call(self, results, function, args, nargout):
+        """ Call a MATLAB function through a result cache.
+        """
+        
+        if results is True:
+            if self.result_cache is None:
+                self.result_cache = cache.ResultCache()
+            results = self.result_cache
+        
+        key = cache.key("Engine.call", function, nargout, *args)
+        if key is None:
+            return self.call(function, *args, nargout=nargout)
+        
+        result = results.get(key, cache._missing)
+        if result is cache._missing:
+            result = self.call(function, *args, nargout=nargout)
+            results.put(key, result)
+        return result
+    
+    def apply_batch(self, function, *inputs, nargout=1, uniform_output=True):
+        """ Call a MATLAB function on each group of items from the inputs (as
+            with map), in a single cellfun call: the inputs are transferred at
+            once, as cell arrays, and the outputs are transferred at once.
+            
+            If uniform_output is True, the function must return scalars, and
+            each output is returned as a 1-D array; otherwise each output is
+            returned as a list. Multiple outputs are returned as a tuple.
+            
+            >>> engine.apply_batch("numel", [[1, 2], [3, 4, 5]])
+            array([2., 3.])
+        """
+        
+        inputs = [list(x) for x in inputs]
+        if len(set(len(x) for x in inputs)) > 1:
+            raise ValueError("All inputs must have the same length")
+        count = len(inputs[0]) if inputs else 0
+        
+        if count == 0:
+            results = tuple(
+                numpy.empty(0) if uniform_output else [] 
+                for _ in range(nargout))
+        else:
+            # Cell array of cell arrays, one for each input. Use explicit
+            # object arrays, since numpy would stack items of the same shape.
+            cells = numpy.empty(len(inputs), object)
+            for index, items in enumerate(inputs):
+                cells[index] = numpy.empty(count, object)
+                for item_index, item in enumerate(items):
+                    cells[index][item_index] = item
+            
+            packed, outputs = self.temporary_names(2)
+            self.put(packed, cells)
+            try:
+                self.eval(
+                    "{outputs} = cell(1, {nargout}); "
+                    "[{outputs}{{:}}] = cellfun(@{function}, {packed}{{:}}, "
+                        "'UniformOutput', {uniform});".format(
+                        outputs=outputs, nargout=nargout, packed=packed,
+                        function=getattr(function, "name", function),
+                        uniform="true" if uniform_output else "false"))
+                values = numpy.ravel(self._get(outputs)) if nargout else []
+            finally:
+                self.eval("clear {} {}".format(packed, outputs))
+            
+            if uniform_output:
+                results = tuple(numpy.ravel(x) for x in values)
+            else:
+                results = tuple(list(numpy.ravel(x)) for x in values)
+        
+        if nargout == 0:
+            return None
+        elif nargout == 1:
+            return results[0]
+        else:
+            return results
+    
+    def _set_output_buffer(self, size):
+        """ Capture the output of MATLAB in a buffer of given size.
+        """
+        
+        # NOTE: the buffer must stay alive as long as MATLAB uses it
+        self.output_size = size
+        self._output = ctypes.create_string_buffer(size)
+        self.libengine.engOutputBuffer(self._engine, self._output, size)
+    
+    def compile(self, source, inputs=(), outputs=()):
+        """ Return a callable running MATLAB statements as a function, with
+            the given names of input and output variables, e.g.
+            
+            >>> norm = engine.compile("y = sqrt(sum(x.^2));", ["x"], ["y"])
+            >>> norm([3, 4])
+            5.0
+            
+            The statements are written once in a function file, which MATLAB
+            optimizes better than the expressions passed to Engine.eval. The
+            functions are cached by source, and deleted when the engine is 
+            closed.
+        """
+        
+        return self._execute(self._compile, source, inputs, outputs)
+    
+    def _compile(self, source, inputs, outputs):
+        inputs, outputs = list(inputs), list(outputs)
+        hash_ = hashlib.sha1(
+            repr([source, inputs, outputs]).encode()).hexdigest()
+        if hash_ in self._functions:
+            return self._functions[hash_]
+        
+        if self._functions_directory is None:
+            self._functions_directory = tempfile.mkdtemp(prefix="meg_")
+            self.eval(
+                "addpath('{}')".format(
+                    self._functions_directory.replace("'", "''")))
+        
+        name = "meg_{}".format(hash_)
+        path = os.path.join(self._functions_directory, "{}.m".format(name))
+        with open(path, "w") as fd:
+            fd.write(
+                "function [{}] = {}({})\n".format(
+                    ", ".join(outputs), name, ", ".join(inputs)))
+            fd.write(source)
+            fd.write("\n")
+        # Make sure MATLAB sees the new file
+        self.eval("rehash")
+        
+        function = Function(self, name, len(outputs))
+        self._functions[hash_] = function
+        return function
+    
+    def namespace(self, prefix=None):
+        """ Return a view of the variables whose name starts with prefix (by
+            default, a new unique prefix), cf. Namespace.
+        """
+        return Namespace(self, prefix)
+    
+    def ref(self, name, owned=False):
+        """ Return a reference to a MATLAB variable, without transferring its
+            data. If owned is True, the variable is cleared when the reference
+            is garbage-collected.
+        """
+        
+        return Reference(self, name, owned)
+    
+    def _get_selection(self, name, index, copy):
+        """ Index a variable in MATLAB and transfer the selection.
+        """
+        
+        subscripts = indexing.Subscripts(index)
+        cell, selection = self.temporary_names(2)
+        try:
+            self.eval(
+                "{code} "
+                "{selection}.data = {name}({cell}{{:}}); "
+                "{selection}.count = numel({cell});".format(
+                    code=subscripts.code(name, cell), 
+                    cell=cell, selection=selection, name=name))
+            values = self._get(selection, copy)
+        finally:
+            self.eval("clear {} {}".format(cell, selection))
+        
+        return subscripts.reshape(values["data"], int(values["count"]))
+    
+    @staticmethod
+    def temporary_names(count):
+        """ Return names of temporary MATLAB variables, which do not collide
+            with other variables.
+        """
+        
+        return ["meg_{}".format(uuid.uuid4().hex) for _ in range(count)]
+    
+    def get(self, name, index=None, copy=True):
+        """ Return the value of a MATLAB variable. If copy is False, numeric
+            and logical arrays are views on the MATLAB data, see 
+            converters.to_python.
+            
+            If index is specified (integers, slices and ellipsis, with the 
+            numpy semantics), the variable is indexed in MATLAB, and only the
+            selection is transferred.
+        """
+        
+        if index is not None:
+            return self._get_selection(name, index, copy)
+        
+        if self.shared_memory_threshold is not None:
+            transferred, value = shared_memory.get(
+                self, name, self.shared_memory_threshold, copy)
+            if transferred:
+                return value
+        
+        return self._get(name, copy)
+    
+    def _get(self, name, copy=True):
+        """ Return the value of a MATLAB variable through the engine channel:
+            used for the internal temporaries (e.g. structures or cells),
+            which are never transferred through shared memory.
+        """
+        
+        array = Array(self._execute(self._get_variable, name))
+        result = converters.to_python(array, copy)
+        # Unconverted arrays are returned as owning handles, views keep their
+        # array alive.
+        if copy and result is not array:
+            array.close()
+        return result
+    
+    def iter_chunks(self, name, axis=-1, chunk_size=1, reuse=True):
+        """ Yield successive slabs of a MATLAB variable, of at most chunk_size
+            elements along axis, so that arrays larger than the memory can be
+            processed.
+            
+            If reuse is True, the numeric slabs are copied to a single buffer,
+            which is overwritten at each step: copy the slabs to keep them.
+        """
+        
+        shape = self.ref(name).shape
+        if not -len(shape) <= axis < len(shape):
+            raise ValueError(
+                "axis {} is out of bounds for {} dimensions".format(
+                    axis, len(shape)))
+        axis = axis % len(shape)
+        
+        buffer_ = None
+        for start in range(0, shape[axis], chunk_size):
+            index = (
+                (slice(None),)*axis + (slice(start, start+chunk_size),))
+            chunk = self.get(name, index, copy=not reuse)
+            if not reuse or not isinstance(chunk, numpy.ndarray):
+                yield chunk
+                continue
+            
+            if buffer_ is None:
+                buffer_ = numpy.empty(chunk.shape, chunk.dtype, order="F")
+            # The last chunk may be smaller
+            view = buffer_[
+                (slice(None),)*axis + (slice(0, chunk.shape[axis]),)]
+            view[...] = chunk
+            yield view
+    
+    def get_many(self, names, copy=True):
+        """ Return the values of several MATLAB variables as a dictionary, 
+            using a single transfer: the variables are packed in a temporary
+            structure, which is then converted.
+        """
+        
+        names = list(names)
+        if not names:
+            return {}
+        
+        temporary, = self.temporary_names(1)
+        try:
+            self.eval(" ".join(
+                "{0}.{1} = {1};".format(temporary, x) for x in names))
+            values = self._get(temporary, copy)
+        finally:
+            self.eval("clear {}".format(temporary))
+        return {x: values[x] for x in names}
     
     def __getitem__(self, name):
         return self.get(name)
     
     def put(self, name, value):
-        return self.libengine.engPutVariable(
-            self._engine, name.encode(), converters.to_matlab(value))
+        digest = cache.digest(value) if self.put_cache else None
+        if digest is not None and self._digests.get(name) == digest:
+            # Unchanged since the last put
+            return
+        self._digests.pop(name, None)
+        
+        if shared_memory.accepts(value, self.shared_memory_threshold):
+            shared_memory.put(self, name, value)
+        else:
+            # engPutVariable copies the array, which can then be destroyed
+            with converters.to_matlab(value) as array:
+                self._execute(self._put_variable, name, array)
+        
+        if digest is not None:
+            self._digests[name] = digest
     
-    def update(self, *args, **kwargs):
+    def _get_variable(self, name):
+        self._check_open()
+        return self.libengine.engGetVariable(self._engine, name.encode())
+    
+    def _put_variable(self, name, array):
+        self._check_open()
+        self.libengine.engPutVariable(self._engine, name.encode(), array)
+    
+    def _check_open(self):
+        # Commands may be queued while the engine is closed
+        if self._engine is None:
+            raise RuntimeError("The engine is not open")
+    
+    def invalidate(self, names=None):
+        """ Forget the digests of the given variables (all variables if names 
+            is None), so that their next put transfers them. This is required
+            if a variable is modified outside of the engine methods, e.g. by a
+            script.
+        """
+        
+        if names is None:
+            self._digests.clear()
+        else:
+            if isinstance(names, str):
+                names = [names]
+            for name in names:
+                self._digests.pop(name, None)
+    
+    def assign(self, name, index, value):
+        """ Replace a selection of a MATLAB variable (cf. Engine.get for the
+            index), transferring only the new values. Scalars are broadcast,
+            and the shape of arrays must match the selection.
+        """
+        
+        subscripts = indexing.Subscripts(index)
+        cell, temporary = self.temporary_names(2)
+        self.put(temporary, value)
+        try:
+            self.eval(
+                "{code} {name}({cell}{{:}}) = {temporary}; "
+                "clear {cell} {temporary}".format(
+                    code=subscripts.code(name, cell), 
+                    name=name, cell=cell, temporary=temporary))
+        except:
+            self.eval("clear {} {}".format(cell, temporary))
+            raise
+    
+    def update(self, *args, batched=False, **kwargs):
+        """ Store multiple variables, either from a dictionary or from keyword
+            arguments. If batched is True, the variables are packed in a single
+            structure and transferred at once, then unpacked in MATLAB.
+        """
+        
         if args:
             dict_ = dict(args[0])
         else:
             dict_ = kwargs
-        for name, value in dict_.items():
-            self.put(name, value)
+        if batched and dict_:
+            temporary, = self.temporary_names(1)
+            self.put(temporary, dict_)
+            self.eval(" ".join(
+                ["{1} = {0}.{1};".format(temporary, x) for x in dict_]
+                + ["clear {};".format(temporary)]))
+        else:
+            for name, value in dict_.items():
+                self.put(name, value)
     
     def __setitem__(self, name, value):
         self.put(name, value)
@@ -65,3 +834,46 @@ class Engine(object):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
         return False
+
+def _error(record):
+    """ MatlabError from an error record, cf. _wrapper.
+    """
+    
+    identifier, message, stack = record[1], record[2], record[3:]
+    return MatlabError(
+        identifier, message, 
+        [
+            (stack[i], stack[i+1], int(stack[i+2])) 
+            for i in range(0, len(stack)-2, 3)])
+
+# Separator of the fields of the error record, and marker of the end of the
+# output.
+_separator, _end = "\x1f", "\x1e"
+
+# Print the error record of the exception stored in meg_status
+_record = (
+    "fprintf('%s', "
+        "char(31), meg_status.identifier, char(31), meg_status.message); "
+    "for meg_frame = meg_status.stack', "
+        "fprintf('%s', "
+            "char(31), meg_frame.file, char(31), meg_frame.name, "
+            "char(31), num2str(meg_frame.line)); "
+    "end; "
+    "clear meg_frame")
+
+# Expression evaluated by Engine.eval: errors are printed as records of the
+# identifier, the message, and the file, name and line of each stack frame.
+# The exception is kept in meg_status until the next evaluation, in case the
+# output is truncated.
+_wrapper = (
+    "clear meg_status\n"
+    "try\n"
+    "{}\n"
+    "catch meg_status\n"
+    + _record + "\n"
+    "end\n"
+    "fprintf('%s', char(30));")
+
+# Error record of the last evaluation, if the output was truncated
+_status = (
+    "if exist('meg_status', 'var'), " + _record + "; end; clear meg_status")
@@ -0,0 +1,21 @@
+class MatlabError(Exception):
+    """ Error raised by MATLAB code run through an engine.
+        
+        The stack is a list of (file, name, line) tuples, from the innermost
+        function to the outermost one; it is empty for errors raised directly
+        in the evaluated expression, and for syntax errors.
+    """
+    
+    def __init__(self, identifier, message, stack=()):
+        super().__init__(identifier, message, stack)
+        self.identifier = identifier
+        self.message = message
+        self.stack = list(stack)
+    
+    def __str__(self):
+        lines = [
+            "{} ({})".format(self.message, self.identifier) 
+            if self.identifier else self.message]
+        for file_, name, line in self.stack:
+            lines.append("  in {} ({}, line {})".format(name, file_, line))
+        return "\n".join(lines)
@@ -0,0 +1,20 @@
+class Function(object):
+    """ MATLAB function with a fixed number of outputs, called through an
+        engine (cf. Engine.call and Engine.compile).
+        
+        >>> norm = meg.Function(engine, "norm")
+        >>> norm([3, 4])
+        5.0
+    """
+    
+    def __init__(self, engine, name, nargout=1):
+        self.engine = engine
+        self.name = name
+        self.nargout = nargout
+    
+    def __call__(self, *args, fetch=True):
+        return self.engine.call(
+            self.name, *args, nargout=self.nargout, fetch=fetch)
+    
+    def __repr__(self):
+        return "<meg.Function {}>".format(self.name)
@@ -0,0 +1,134 @@
+import numbers
+
+import numpy
+
+class Subscripts(object):
+    """ MATLAB subscripts equivalent to a numpy basic index, i.e. a tuple of
+        integers, slices and at most one Ellipsis.
+        
+        MATLAB indices are 1-based, and out-of-range slice bounds are not
+        allowed: the subscripts are computed in MATLAB, from the size of the
+        indexed variable, and stored in a cell array.
+    """
+    
+    def __init__(self, index):
+        if not isinstance(index, tuple):
+            index = (index,)
+        
+        if sum(1 for x in index if x is Ellipsis) > 1:
+            raise IndexError("An index can only have a single ellipsis")
+        for item in index:
+            if not (
+                    item is Ellipsis or isinstance(item, slice)
+                    or _is_integer(item)):
+                raise IndexError(
+                    "Only integers, slices and ellipsis are supported, "
+                    "not {}".format(type(item).__name__))
+        
+        if Ellipsis in index:
+            position = index.index(Ellipsis)
+            self.before = index[:position]
+            self.after = index[position+1:]
+        else:
+            self.before, self.after = index, ()
+    
+    @property
+    def count(self):
+        """ Number of explicitly indexed axes.
+        """
+        return len(self.before)+len(self.after)
+    
+    def code(self, variable, name):
+        """ MATLAB code storing in the cell array `name` the subscripts of
+            `variable`.
+        """
+        
+        statements = [
+            "{} = repmat({{':'}}, 1, max(ndims({}), {}));".format(
+                name, variable, self.count)]
+        for axis, item in self._axes(name):
+            size = "size({}, {})".format(variable, axis)
+            subscript = _subscript(item, size)
+            if subscript != ":":
+                statements.append(
+                    "{}{{{}}} = {};".format(name, axis, subscript))
+        return " ".join(statements)
+    
+    def shape(self, shape, count):
+        """ Shape of the numpy selection from the shape of the MATLAB
+            selection and from the number of MATLAB subscripts.
+        """
+        
+        # Trailing singleton dimensions are dropped by MATLAB
+        shape = tuple(shape)+(1,)*(count-len(shape))
+        
+        integers = set()
+        for axis, item in enumerate(self.before):
+            if _is_integer(item):
+                integers.add(axis)
+        for axis, item in enumerate(reversed(self.after)):
+            if _is_integer(item):
+                integers.add(count-1-axis)
+        
+        return tuple(
+            x for axis, x in enumerate(shape) if axis not in integers)
+    
+    def reshape(self, data, count):
+        """ Reshape the MATLAB selection to the numpy selection. Only numpy
+            arrays and scalars are reshaped.
+        """
+        
+        if not isinstance(data, (numpy.ndarray, numpy.generic)):
+            return data
+        shape = self.shape(numpy.shape(data), count)
+        if shape == () and isinstance(data, numpy.generic):
+            return data
+        return numpy.reshape(data, shape, order="F")
+    
+    def _axes(self, name):
+        """ MATLAB (1-based) axes of the index items, axes after the ellipsis
+            are counted from the last one.
+        """
+        
+        for axis, item in enumerate(self.before):
+            yield str(axis+1), item
+        for axis, item in enumerate(reversed(self.after)):
+            yield "numel({})-{}".format(name, axis), item
+
+def _is_integer(item):
+    return isinstance(item, numbers.Integral) and not isinstance(item, bool)
+
+def _subscript(item, size):
+    """ MATLAB subscript equivalent to an integer or a slice on an axis of
+        given size (a MATLAB expression).
+    """
+    
+    if _is_integer(item):
+        item = int(item)
+        return str(item+1) if item >= 0 else "{}{:+d}".format(size, item+1)
+    
+    start, stop, step = item.start, item.stop, item.step
+    step = 1 if step is None else int(step)
+    if step == 0:
+        raise ValueError("slice step cannot be zero")
+    
+    if start is None and stop is None and step == 1:
+        return ":"
+    
+    def bound(value, default, low, high):
+        # Same rules as slice.indices: negative values are relative to the end
+        # and the result is clamped
+        if value is None:
+            return default
+        value = int(value)
+        value = str(value) if value >= 0 else "{}{:+d}".format(size, value)
+        return "max(min({}, {}), {})".format(value, high, low)
+    
+    if step > 0:
+        start = bound(start, "0", "0", size)
+        stop = bound(stop, size, "0", size)
+        return "({})+1:{}:{}".format(start, step, stop)
+    else:
+        start = bound(start, "{}-1".format(size), "-1", "{}-1".format(size))
+        stop = bound(stop, "-1", "-1", "{}-1".format(size))
+        return "({})+1:{}:({})+2".format(start, step, stop)
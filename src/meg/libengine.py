@@ -5,7 +5,7 @@ import os
 import sys
 
 from . import library
-from .libmatrix import mxArray_p
+from .libmatrix import mxArray_p, suffixes
 
 c_bool_p = ctypes.POINTER(c_bool)
 c_int_p = ctypes.POINTER(c_int)
@@ -38,4 +38,4 @@ try:
 except StopIteration:
     path = glob.glob(os.path.join(matlab_root, "bin", "maci64", "libeng.*"))[0]
 lib = ctypes.CDLL(path)
-library.set_api(lib, api, sys.modules[__name__], ["_730"])
+library.set_api(lib, api, sys.modules[__name__], suffixes)
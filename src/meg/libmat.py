@@ -0,0 +1,44 @@
+import ctypes
+from ctypes import c_char_p, c_int, c_void_p
+import glob
+import os
+import sys
+
+from . import library
+from .libmatrix import mxArray_p, suffixes
+
+c_char_p_p = ctypes.POINTER(c_char_p)
+c_int_p = ctypes.POINTER(c_int)
+
+#########
+# mat.h #
+#########
+
+# https://www.mathworks.com/help/matlab/matlab-c-api-to-read-mat-file-data.html
+class MATFile(ctypes.Structure): pass
+MATFile_p = ctypes.POINTER(MATFile)
+matError = c_int
+api = {
+    "matOpen": [[c_char_p, c_char_p], MATFile_p, library.fail_on_zero],
+    "matClose": [[MATFile_p], matError, library.fail_on_non_zero],
+    # NOTE: a null pointer is returned if the variable does not exist
+    "matGetVariable": [[MATFile_p, c_char_p], mxArray_p],
+    "matGetVariableInfo": [[MATFile_p, c_char_p], mxArray_p],
+    "matPutVariable": 
+        [[MATFile_p, c_char_p, mxArray_p], matError, library.fail_on_non_zero],
+    "matDeleteVariable": [[MATFile_p, c_char_p], matError],
+    # NOTE: the returned array must be released using mxFree. A null pointer 
+    # is returned for empty files.
+    "matGetDir": [[MATFile_p, c_int_p], c_void_p],
+    # NOTE: a null pointer is returned after the last variable
+    "matGetNextVariable": [[MATFile_p, c_char_p_p], mxArray_p],
+    "matGetNextVariableInfo": [[MATFile_p, c_char_p_p], mxArray_p],
+}
+
+from meg import matlab_root
+try:
+    path = glob.glob(os.path.join(matlab_root, "bin", "glnxa64", "libmat.*"))[0]
+except StopIteration:
+    path = glob.glob(os.path.join(matlab_root, "bin", "maci64", "libmat.*"))[0]
+lib = ctypes.CDLL(path)
+library.set_api(lib, api, sys.modules[__name__], suffixes)
@@ -316,8 +316,9 @@ api = {
     # mxMakeArrayComplex, mxMakeArrayReal: >= R2018a
     
     # Character
-    "mxArrayToString": [[mxArray_p], c_char_p, library.fail_on_zero],
-    "mxArrayToUTF8String": [[mxArray_p], c_char_p, library.fail_on_zero], # >= R2015a
+    # NOTE: the returned strings must be released using mxFree
+    "mxArrayToString": [[mxArray_p], c_void_p, library.fail_on_zero],
+    "mxArrayToUTF8String": [[mxArray_p], c_void_p, library.fail_on_zero], # >= R2015a
     "mxGetString": 
         [[mxArray_p, c_char_p, mwSize], c_int, library.fail_on_non_zero],
     
@@ -352,4 +353,13 @@ try:
 except StopIteration:
     path = glob.glob(os.path.join(matlab_root, "bin", "maci64", "libmx.*"))[0]
 lib = ctypes.CDLL(path)
-library.set_api(lib, api, sys.modules[__name__], ["_730", "_800"])
+
+# Starting with R2018a, complex arrays may be stored interleaved: the _800
+# symbols use this layout, while the _730 ones use separate storage. Bind all
+# functions to the same API, falling back to _730 for the functions which have
+# no _800 version. The same suffixes must be used for libmat and libengine.
+interleaved_complex = any(
+    hasattr(lib, "mxGetComplexDoubles{}".format(suffix))
+    for suffix in ["", "_800"])
+suffixes = ["_800", "_730"] if interleaved_complex else ["_730"]
+library.set_api(lib, api, sys.modules[__name__], suffixes)
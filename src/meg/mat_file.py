@@ -0,0 +1,148 @@
+import collections.abc
+import ctypes
+
+from . import converters
+from .array import Array
+
+class MatFile(collections.abc.MutableMapping):
+    """ MAT-file, accessed as a mapping from variable names to values, without
+        a MATLAB engine.
+        
+        Listing the variables does not load them: each variable is read and
+        converted (cf. converters.to_python) only when it is accessed. The
+        mode is the one of matOpen: "r" (read-only), "u" (update), "w" (write,
+        version 5 format), "w7.3" (write, HDF5-based format), etc.
+        
+        >>> with meg.MatFile("data.mat") as mat_file:
+        ...     print(list(mat_file))
+        ...     data = mat_file["data"]
+    """
+    
+    def __init__(self, path, mode="r"):
+        # WARNING: the modules must be imported *after* the setup has taken
+        # place.
+        from . import libmat, libmatrix
+        self.libmat = libmat
+        self.libmatrix = libmatrix
+        
+        self.path = path
+        self.mode = mode
+        self._file = None
+        
+        self.open()
+    
+    def __del__(self):
+        if getattr(self, "_file", None) is not None:
+            self.close()
+    
+    def open(self):
+        if self._file is None:
+            self._file = self.libmat.matOpen(
+                str(self.path).encode(), self.mode.encode())
+    
+    def close(self):
+        try:
+            if self._file is not None:
+                self.libmat.matClose(self._file)
+        finally:
+            self._file = None
+    
+    @property
+    def is_open(self):
+        return self._file is not None
+    
+    def get(self, name, default=None, copy=True):
+        """ Read and convert a variable, or return default if it does not 
+            exist. If copy is False, cf. converters.to_python.
+        """
+        
+        pointer = self.libmat.matGetVariable(self._file, name.encode())
+        if not pointer:
+            return default
+        
+        array = Array(pointer)
+        result = converters.to_python(array, copy)
+        # Unconverted arrays are returned as owning handles, views keep their
+        # array alive.
+        if copy and result is not array:
+            array.close()
+        return result
+    
+    def info(self):
+        """ Return the size and class of all variables, as a dictionary of
+            (shape, class name) pairs, reading only the headers of the
+            variables.
+        """
+        
+        # The sequential access must start just after matOpen: use a separate
+        # handle.
+        file_ = self.libmat.matOpen(str(self.path).encode(), b"r")
+        try:
+            info = {}
+            name = ctypes.c_char_p()
+            while True:
+                pointer = self.libmat.matGetNextVariableInfo(
+                    file_, ctypes.byref(name))
+                if not pointer:
+                    break
+                with Array(pointer) as header:
+                    dimensions = self.libmatrix.mxGetDimensions(header)
+                    shape = tuple(
+                        dimensions[i] for i in range(
+                            self.libmatrix.mxGetNumberOfDimensions(header)))
+                    info[name.value.decode()] = (
+                        shape, self.libmatrix.mxGetClassName(header).decode())
+            return info
+        finally:
+            self.libmat.matClose(file_)
+    
+    def __getitem__(self, name):
+        result = self.get(name, _missing)
+        if result is _missing:
+            raise KeyError(name)
+        return result
+    
+    def __setitem__(self, name, value):
+        # matPutVariable copies the array, which can then be destroyed
+        with converters.to_matlab(value) as array:
+            self.libmat.matPutVariable(self._file, name.encode(), array)
+    
+    def __delitem__(self, name):
+        if self.libmat.matDeleteVariable(self._file, name.encode()) != 0:
+            raise KeyError(name)
+    
+    def __iter__(self):
+        return iter(self._names())
+    
+    def __len__(self):
+        return len(self._names())
+    
+    def __contains__(self, name):
+        return name in self._names()
+    
+    def _names(self):
+        """ Names of the variables, from the directory of the file.
+        """
+        
+        count = ctypes.c_int()
+        directory = self.libmat.matGetDir(self._file, ctypes.byref(count))
+        if count.value < 0:
+            raise RuntimeError(
+                "Could not read the directory of {}".format(self.path))
+        if not directory:
+            return []
+        try:
+            names = ctypes.cast(directory, ctypes.POINTER(ctypes.c_char_p))
+            return [names[i].decode() for i in range(count.value)]
+        finally:
+            self.libmatrix.mxFree(directory)
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+_missing = object()
@@ -0,0 +1,85 @@
+import string
+import uuid
+
+class Namespace(object):
+    """ View of the variables of an engine whose name starts with a prefix,
+        so that independent callers sharing an engine (e.g. threads) do not
+        overwrite each other's variables.
+        
+        Names are prefixed in all methods. In the expressions of eval, named
+        fields are replaced by prefixed names, while positional fields are
+        formatted with the arguments, as in Engine.eval: the braces of MATLAB
+        code must then be doubled.
+        
+        >>> with engine.namespace() as namespace:
+        ...     namespace["x"] = 42
+        ...     namespace.eval("{y} = 2*{x}")
+        ...     y = namespace["y"]
+    """
+    
+    def __init__(self, engine, prefix=None):
+        self.engine = engine
+        self.prefix = (
+            prefix if prefix is not None 
+            else "meg_{}_".format(uuid.uuid4().hex[:16]))
+    
+    def name(self, name):
+        """ Name of a variable in the engine.
+        """
+        return "{}{}".format(self.prefix, name)
+    
+    def eval(self, expression, *args, timeout=None):
+        expression = string.Formatter().vformat(
+            expression, args, _Names(self.prefix))
+        return self.engine.eval(expression, timeout=timeout)
+    
+    def __call__(self, expression, *args, timeout=None):
+        return self.eval(expression, *args, timeout=timeout)
+    
+    def get(self, name, index=None, copy=True):
+        return self.engine.get(self.name(name), index, copy)
+    
+    def get_many(self, names, copy=True):
+        values = self.engine.get_many([self.name(x) for x in names], copy)
+        return {x: values[self.name(x)] for x in names}
+    
+    def put(self, name, value):
+        return self.engine.put(self.name(name), value)
+    
+    def update(self, *args, batched=False, **kwargs):
+        dict_ = dict(args[0]) if args else kwargs
+        self.engine.update(
+            {self.name(k): v for k, v in dict_.items()}, batched=batched)
+    
+    def ref(self, name, owned=False):
+        return self.engine.ref(self.name(name), owned)
+    
+    def clear(self):
+        """ Clear all the variables of the namespace.
+        """
+        self.engine.eval("clear -regexp ^{}".format(self.prefix))
+    
+    def __getitem__(self, name):
+        return self.get(name)
+    
+    def __setitem__(self, name, value):
+        self.put(name, value)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.engine.is_open:
+            self.clear()
+        return False
+
+class _Names(dict):
+    """ Mapping from names to prefixed names.
+    """
+    
+    def __init__(self, prefix):
+        super().__init__()
+        self.prefix = prefix
+    
+    def __missing__(self, key):
+        return "{}{}".format(self.prefix, key)
@@ -0,0 +1,95 @@
+import concurrent.futures
+import os
+import queue
+import threading
+
+from .pool import EnginePool
+
+def map(function, *iterables, engines=None, nargout=1, ordered=True):
+    """ Call the MATLAB function on each group of items from the iterables,
+        spreading the calls across several engines, in the style of
+        concurrent.futures.Executor.map.
+        
+        engines is either an EnginePool or the number of engines to start
+        (defaults to the number of CPUs). Each engine of the pool is used by
+        a worker thread, which calls the function through Engine.call: see
+        this function for the handling of nargout.
+        
+        The results are yielded in order if ordered is True, and as soon as
+        they are available otherwise.
+        
+        >>> list(meg.map("max", [[1, 2], [4, 3]], engines=2))
+        [2, 4]
+    """
+    
+    if isinstance(engines, EnginePool):
+        pool, own_pool = engines, False
+    else:
+        pool, own_pool = EnginePool(engines or os.cpu_count()), True
+    
+    tasks = queue.Queue()
+    futures = []
+    for arguments in zip(*iterables):
+        future = concurrent.futures.Future()
+        futures.append(future)
+        tasks.put((future, arguments))
+    
+    stop = threading.Event()
+    workers = []
+    
+    if own_pool:
+        pool.open()
+    try:
+        for _ in range(pool.size):
+            worker = threading.Thread(
+                target=_worker, args=(pool, tasks, stop, function, nargout),
+                daemon=True)
+            worker.start()
+            workers.append(worker)
+        
+        iterator = (
+            futures if ordered else concurrent.futures.as_completed(futures))
+        for future in iterator:
+            yield future.result()
+    finally:
+        # Also stop the workers if the results are not fully consumed.
+        stop.set()
+        for future in futures:
+            future.cancel()
+        for worker in workers:
+            worker.join()
+        if own_pool:
+            pool.close()
+
+def _worker(pool, tasks, stop, function, nargout):
+    """ Borrow an engine from the pool and process tasks until none are
+        left.
+    """
+    
+    try:
+        with pool.engine() as engine:
+            while not stop.is_set():
+                try:
+                    future, arguments = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                
+                if not future.set_running_or_notify_cancel():
+                    continue
+                
+                try:
+                    result = engine.call(function, *arguments, nargout=nargout)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+    except Exception as e:
+        # No engine could be borrowed: fail the remaining tasks, otherwise the
+        # caller waits forever for their results.
+        while True:
+            try:
+                future, _ = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
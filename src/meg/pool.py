@@ -0,0 +1,194 @@
+import contextlib
+import queue
+import threading
+
+from . import resources
+from .engine import Engine
+
+class EnginePool(object):
+    """ Pool of MATLAB engines, shared between threads.
+        
+        The engines are started when the pool is opened, and handed out by
+        the `engine` context manager. When an engine is returned to the pool,
+        its workspace is cleared; engines which died are replaced.
+        
+        If affinity is True, each engine is pinned to a disjoint set of CPUs
+        (cf. resources.split), and uses one thread per CPU unless threads is
+        given. Other keyword arguments (e.g. profile, warm_up or threads) are
+        passed to the engines.
+        
+        >>> with meg.EnginePool(4) as pool:
+        ...     with pool.engine() as engine:
+        ...         engine("x = 42")
+    """
+    
+    def __init__(
+            self, size, command=None, single_use=False, affinity=False, 
+            **kwargs):
+        self.size = size
+        self.command = command
+        self.single_use = single_use
+        self.affinity = affinity
+        self.options = kwargs
+        
+        # Number of engines which were replaced after they died
+        self.replaced = 0
+        
+        self._engines = []
+        self._available = queue.Queue()
+        self._in_use = 0
+        self._lock = threading.Lock()
+    
+    def open(self):
+        """ Start all the engines of the pool, in parallel.
+        """
+        
+        if self.affinity:
+            engines = [self._create(x) for x in resources.split(self.size)]
+        else:
+            engines = [self._create() for _ in range(self.size)]
+        for engine in engines:
+            engine.open(background=True)
+        try:
+            for engine in engines:
+                engine.ready()
+        except:
+            for engine in engines:
+                # Wait for the other engines to be started before stopping
+                # them
+                try:
+                    if engine.ready():
+                        engine.close()
+                except Exception:
+                    pass
+            raise
+        
+        self._engines = engines
+        for engine in engines:
+            self._available.put(engine)
+    
+    def close(self):
+        """ Stop all the engines of the pool, including those in use.
+        """
+        
+        with self._lock:
+            engines, self._engines = self._engines, []
+            self._available = queue.Queue()
+        for engine in engines:
+            if engine.is_open:
+                try:
+                    engine.close()
+                except RuntimeError:
+                    # Already dead
+                    pass
+    
+    @contextlib.contextmanager
+    def engine(self, timeout=None):
+        """ Borrow an engine from the pool, waiting at most timeout seconds
+            (or forever if timeout is None) for one to be available. Raise
+            queue.Empty if no engine was available in time.
+        """
+        
+        engine = self._available.get(timeout=timeout)
+        if not engine.is_open:
+            # A previous replacement failed: try again, keeping the slot if
+            # this one also fails.
+            try:
+                replacement = self._replace(engine)
+            except Exception:
+                self._available.put(engine)
+                raise
+            if replacement is None:
+                raise RuntimeError("The pool was closed")
+            engine = replacement
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield engine
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._release(engine)
+    
+    @property
+    def in_use(self):
+        """ Number of engines currently borrowed from the pool.
+        """
+        return self._in_use
+    
+    @property
+    def available(self):
+        """ Number of engines ready to be borrowed.
+        """
+        return self._available.qsize()
+    
+    @property
+    def utilization(self):
+        """ Fraction of the engines currently in use.
+        """
+        return self._in_use / self.size if self.size else 0.
+    
+    @property
+    def restarts(self):
+        """ Number of restarts of the engines of the pool, e.g. after
+            timeouts (cf. Engine.eval).
+        """
+        return sum(x.restarts for x in self._engines)
+    
+    def _release(self, engine):
+        """ Clear the workspace of an engine and make it available again,
+            replacing it if it died.
+        """
+        
+        with self._lock:
+            if engine not in self._engines:
+                # The pool was closed while the engine was in use.
+                return
+        
+        try:
+            engine.eval("clear")
+        except RuntimeError:
+            try:
+                engine = self._replace(engine)
+            except Exception as e:
+                # Do not hide the exception of the caller, and keep the slot:
+                # the closed engine will be replaced when it is borrowed.
+                print("WARNING: could not replace engine: {}".format(e))
+        with self._lock:
+            if engine is not None and engine in self._engines:
+                self._available.put(engine)
+    
+    def _replace(self, engine):
+        """ Close a dead engine and start a new one in its place. Return None
+            if the pool was closed in the meantime.
+        """
+        
+        if engine.is_open:
+            try:
+                engine.close()
+            except RuntimeError:
+                pass
+        
+        replacement = self._create(engine.affinity)
+        replacement.open()
+        with self._lock:
+            if engine in self._engines:
+                self._engines[self._engines.index(engine)] = replacement
+                self.replaced += 1
+                return replacement
+        replacement.close()
+        return None
+    
+    def _create(self, affinity=None):
+        options = dict(self.options)
+        if affinity is not None:
+            options["affinity"] = affinity
+        return Engine(self.command, self.single_use, **options)
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
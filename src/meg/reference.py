@@ -0,0 +1,83 @@
+import weakref
+
+class Reference(object):
+    """ Reference to a MATLAB variable, whose data stays in the engine until
+        it is fetched.
+        
+        References can be passed as arguments to Engine.call, and formatted
+        in the expressions of Engine.eval, where they are replaced by the
+        name of the variable. If the reference owns its variable, the variable
+        is cleared when the reference is garbage-collected (in fact, before
+        the next command of the engine).
+    """
+    
+    def __init__(self, engine, name, owned=False):
+        self.engine = engine
+        self.name = name
+        if owned:
+            self._finalizer = weakref.finalize(self, _clear, engine, name)
+        else:
+            self._finalizer = None
+    
+    @property
+    def owned(self):
+        return self._finalizer is not None and self._finalizer.alive
+    
+    @property
+    def shape(self):
+        """ Size of the variable, queried without transferring its data.
+        """
+        return tuple(int(x) for x in self.engine.call("size", self).ravel())
+    
+    @property
+    def ndim(self):
+        return int(self.engine.call("ndims", self))
+    
+    @property
+    def size(self):
+        """ Number of elements of the variable.
+        """
+        return int(self.engine.call("numel", self))
+    
+    @property
+    def class_name(self):
+        """ MATLAB class of the variable.
+        """
+        return self.engine.call("class", self)
+    
+    def fetch(self, index=None, copy=True):
+        """ Transfer the value of the variable to Python, cf. Engine.get.
+        """
+        return self.engine.get(self.name, index, copy)
+    
+    def __getitem__(self, index):
+        """ Transfer a selection of the variable to Python, cf. Engine.get.
+        """
+        return self.engine.get(self.name, index)
+    
+    def __setitem__(self, index, value):
+        """ Replace a selection of the variable, cf. Engine.assign.
+        """
+        self.engine.assign(self.name, index, value)
+    
+    def clear(self):
+        """ Clear the variable if it is owned by the reference. The variable
+            is cleared before the next command of the engine.
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+    
+    def __str__(self):
+        return self.name
+    
+    def __format__(self, format_spec):
+        return format(self.name, format_spec)
+    
+    def __repr__(self):
+        return "<meg.Reference to {}>".format(self.name)
+
+def _clear(engine, name):
+    # NOTE: the finalizer may run at any time, e.g. during another command of
+    # the engine: only schedule the clear, which runs before the next command.
+    if engine.is_open:
+        engine._pending_clears.append(name)
@@ -0,0 +1,73 @@
+""" Computational resources of the engines: the cores of the host which are
+    not used by the engines with a fixed number of threads are divided evenly
+    across the other live engines (cf. Engine).
+"""
+
+import os
+import threading
+import weakref
+
+# Live engines
+_engines = weakref.WeakSet()
+_lock = threading.Lock()
+
+def cpus():
+    """ CPUs available to the current process.
+    """
+    
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    else:
+        return list(range(os.cpu_count()))
+
+def share(count, reserved=0):
+    """ Number of threads of each engine when count engines are running, and
+        reserved threads are used by other engines.
+    """
+    return max(1, (len(cpus())-reserved) // max(1, count))
+
+def split(count):
+    """ Split the available CPUs in count disjoint sets of the same size. If 
+        there are more sets than CPUs, each set has one CPU, and the CPUs are
+        re-used.
+    """
+    
+    cpus_ = cpus()
+    size = share(count)
+    return [
+        [cpus_[(index*size+x) % len(cpus_)] for x in range(size)]
+        for index in range(count)]
+
+def register(engine):
+    """ Add an engine to the live engines, and re-balance the threads.
+    """
+    
+    with _lock:
+        _engines.add(engine)
+    rebalance()
+
+def unregister(engine):
+    """ Remove an engine from the live engines, and re-balance the threads.
+    """
+    
+    with _lock:
+        _engines.discard(engine)
+    rebalance()
+
+def rebalance():
+    """ Set the number of threads of the live engines which do not have a
+        fixed number of threads.
+    """
+    
+    with _lock:
+        # Engines being closed cannot run commands anymore
+        engines = [x for x in _engines if x.is_open]
+    
+    flexible = [x for x in engines if x.threads is None]
+    count = share(
+        len(flexible),
+        sum(x.threads for x in engines if x.threads is not None))
+    for engine in flexible:
+        if engine.compute_threads != count:
+            # Do not wait for busy engines
+            engine.submit(engine._set_threads, count)
@@ -0,0 +1,170 @@
+""" Transfer of large numeric arrays through files in shared memory (i.e.
+    /dev/shm when available), instead of the engine channel.
+    
+    The data is written once in a file, which MATLAB reads with fread (for
+    puts) or writes with fwrite (for gets). The files are removed after each
+    transfer.
+"""
+
+import mmap
+import os
+import tempfile
+import uuid
+
+import numpy
+
+# Directory of the temporary files: a RAM-backed file system if possible
+directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# MATLAB classes of the transferable arrays
+classes = {
+    "double": numpy.float64, "single": numpy.float32,
+    "int8": numpy.int8, "uint8": numpy.uint8,
+    "int16": numpy.int16, "uint16": numpy.uint16,
+    "int32": numpy.int32, "uint32": numpy.uint32,
+    "int64": numpy.int64, "uint64": numpy.uint64,
+    "logical": numpy.bool_,
+}
+
+def accepts(value, threshold):
+    """ Test whether a Python value is transferred through shared memory, i.e.
+        if it is a numeric or logical numpy array whose size is at least
+        threshold bytes.
+    """
+    
+    if threshold is None or not isinstance(value, numpy.ndarray):
+        return False
+    if value.dtype.kind not in "biufc" or value.dtype.byteorder == ">":
+        return False
+    return value.nbytes >= threshold
+
+def put(engine, name, value):
+    """ Store a numpy array in a MATLAB variable through a file. Memory-mapped
+        arrays (numpy.memmap) are read directly from their file.
+    """
+    
+    array = value
+    if array.ndim < 2:
+        array = array.reshape((1,)*(2-array.ndim)+array.shape)
+    
+    if (
+            isinstance(value, numpy.memmap) and _is_file_mapping(value)
+            and array.flags.f_contiguous):
+        # Read the existing file
+        value.flush()
+        path, offset, temporary = value.filename, value.offset, False
+    else:
+        descriptor, path = tempfile.mkstemp(".bin", "meg_", directory)
+        os.close(descriptor)
+        offset, temporary = 0, True
+    
+    try:
+        if temporary:
+            # Single copy, from the strides of the source
+            file_ = numpy.memmap(
+                path, array.dtype, "w+", shape=array.shape, order="F")
+            file_[...] = array
+            file_.flush()
+            del file_
+        
+        class_name = {
+            numpy.dtype(v): k for k, v in classes.items()}[array.real.dtype]
+        
+        fid, = engine.temporary_names(1)
+        if array.dtype.kind == "c":
+            # Interleaved real and imaginary parts
+            read = (
+                "{name} = fread({fid}, [2, Inf], '*{class_}'); "
+                "{name} = complex({name}(1, :), {name}(2, :));")
+        elif array.dtype.kind == "b":
+            read = "{name} = logical(fread({fid}, Inf, '*uint8'));"
+        else:
+            read = "{name} = fread({fid}, Inf, '*{class_}');"
+        engine.eval(
+            ("{fid} = fopen('{path}', 'r'); fseek({fid}, {offset}, 'bof'); "
+                + read + " fclose({fid}); clear {fid}; "
+                "{name} = reshape({name}, [{shape}]);").format(
+                    name=name, fid=fid, path=_quote(path), offset=offset,
+                    class_=class_name,
+                    shape=" ".join(str(x) for x in array.shape)))
+    finally:
+        if temporary:
+            os.remove(path)
+
+def get(engine, name, threshold, copy=True):
+    """ Get a MATLAB variable through a file, if it is a full numeric or
+        logical array of at least threshold bytes. Return a pair of a boolean
+        (whether the variable was transferred) and the value of the variable.
+        
+        If copy is False, the array is memory-mapped from the file, without
+        copying it.
+    """
+    
+    # The file is created by MATLAB, only if the variable is transferred
+    path = os.path.join(
+        directory or tempfile.gettempdir(),
+        "meg_{}.bin".format(uuid.uuid4().hex))
+    
+    try:
+        fid, info = engine.temporary_names(2)
+        # The class, the complexity and the size of the array are printed if
+        # it was written. NOTE: complex integer arrays are not transferred,
+        # logical arrays are written as uint8.
+        output = engine._query(
+            "{info} = whos('{name}'); "
+            "if ~isempty({info}) "
+                "&& (isnumeric({name}) || islogical({name})) "
+                "&& (isreal({name}) || isfloat({name})) "
+                "&& ~issparse({name}) && ~isempty({name}) "
+                "&& {info}.bytes >= {threshold}; "
+                "{fid} = fopen('{path}', 'w'); "
+                "if isreal({name}); "
+                    "fwrite({fid}, {name}, {precision}); "
+                "else; "
+                    "fwrite({fid}, [real({name}(:)) imag({name}(:))].', "
+                        "{precision}); "
+                "end; "
+                "fclose({fid}); "
+                "fprintf('%s %d', class({name}), ~isreal({name})); "
+                "fprintf(' %d', size({name})); "
+            "end; "
+            "clear {info} {fid}".format(
+                name=name, info=info, fid=fid, path=_quote(path),
+                threshold=threshold,
+                precision="strrep(class({}), 'logical', 'uint8')".format(
+                    name)))
+        
+        if not output:
+            return False, None
+        class_name, complex_, *shape = output.split()
+        
+        dtype = numpy.dtype(classes[class_name])
+        if int(complex_):
+            # Interleaved real and imaginary parts
+            dtype = numpy.result_type(dtype, numpy.complex64)
+        shape = tuple(int(x) for x in shape)
+        
+        if copy:
+            value = numpy.fromfile(path, dtype).reshape(shape, order="F")
+        else:
+            # The mapping remains valid once the file is removed
+            value = numpy.memmap(path, dtype, "r+", shape=shape, order="F")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    
+    # Same as converters.to_python
+    if value.size == 1:
+        value = value.ravel()[0]
+    
+    return True, value
+
+def _is_file_mapping(array):
+    """ Test whether a memory-mapped array covers a whole mapping, i.e. is not
+        a view, so that its filename and offset describe its data.
+    """
+    
+    return isinstance(array.base, mmap.mmap) and array.filename is not None
+
+def _quote(path):
+    return path.replace("'", "''")
@@ -0,0 +1,49 @@
+""" Start-up options of MATLAB engines.
+"""
+
+# Command-line options of MATLAB, by profile name. Without the JVM, the
+# figures, the desktop and Java-based functions are unavailable.
+profiles = {
+    "default": [],
+    "headless": ["-nodisplay", "-nosplash"],
+    "minimal": ["-nojvm", "-nodisplay", "-nosplash"],
+    "single_thread": [
+        "-nojvm", "-nodisplay", "-nosplash", "-singleCompThread"],
+}
+
+def options(profile):
+    """ Return the command-line options of a profile, either given by name
+        (cf. profiles) or as a sequence of options.
+    """
+    
+    if profile is None:
+        return []
+    elif isinstance(profile, str):
+        try:
+            return list(profiles[profile])
+        except KeyError:
+            raise ValueError("No such profile: {}".format(profile))
+    else:
+        return list(profile)
+
+def warm_up(paths=(), functions=(), expressions=()):
+    """ Return a warm-up hook (cf. Engine), which adds directories to the
+        path, loads functions, and evaluates expressions to prime the JIT.
+        
+        >>> engine = meg.Engine(warm_up=meg.startup.warm_up(
+        ...     paths=["/opt/toolbox"], functions=["my_filter"],
+        ...     expressions=["fft(rand(256));"]))
+    """
+    
+    def hook(engine):
+        for path in paths:
+            engine.eval("addpath('{}')".format(path.replace("'", "''")))
+        for function in functions:
+            # nargin parses the function file, without calling the function
+            engine.eval(
+                "try, nargin('{}'); catch, end".format(
+                    function.replace("'", "''")))
+        for expression in expressions:
+            engine.eval(expression)
+    
+    return hook
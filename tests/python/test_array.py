@@ -0,0 +1,44 @@
+import unittest
+
+import numpy
+
+import meg
+
+class TestArray(unittest.TestCase):
+    def test_close(self):
+        array = meg.Array(meg.libmatrix.mxCreateDoubleMatrix(
+            3, 4, meg.libmatrix.Complexity.REAL))
+        self.assertTrue(array.owned)
+        self.assertEqual(meg.libmatrix.mxGetNumberOfElements(array), 12)
+        
+        array.close()
+        self.assertFalse(array.owned)
+        self.assertIsNone(array.pointer)
+        with self.assertRaises(ValueError):
+            meg.libmatrix.mxGetNumberOfElements(array)
+        
+        # Closing twice is a no-op
+        array.close()
+    
+    def test_context_manager(self):
+        with meg.Array(meg.libmatrix.mxCreateDoubleScalar(42)) as array:
+            self.assertEqual(meg.libmatrix.mxGetScalar(array), 42)
+        self.assertIsNone(array.pointer)
+    
+    def test_release(self):
+        array = meg.Array(meg.libmatrix.mxCreateDoubleScalar(42))
+        pointer = array.release()
+        self.assertFalse(array.owned)
+        self.assertEqual(meg.libmatrix.mxGetScalar(pointer), 42)
+        meg.libmatrix.mxDestroyArray(pointer)
+    
+    def test_borrowed(self):
+        cell = meg.converters.to_matlab(numpy.array([1, "foo"], dtype=object))
+        item = meg.Array(meg.libmatrix.mxGetCell(cell, 1), cell)
+        self.assertFalse(item.owned)
+        self.assertEqual(meg.converters.to_python(item), "foo")
+        item.close()
+        self.assertTrue(cell.owned)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+
+import numpy
+
+import meg
+
+class TestAsyncEngine(unittest.TestCase):
+    def test_operations(self):
+        async def run():
+            async with meg.AsyncEngine() as engine:
+                data = numpy.random.random((3, 4))
+                await engine.put("data", data)
+                output = await engine.eval("disp(numel(data))")
+                numpy.testing.assert_array_equal(
+                    await engine.get("data"), data)
+                maximum = await engine.call("max", data.ravel())
+                return output, maximum, data.max()
+        
+        output, maximum, expected = asyncio.run(run())
+        self.assertEqual(output.strip(), "12")
+        self.assertEqual(maximum, expected)
+    
+    def test_concurrent(self):
+        async def run():
+            async with meg.AsyncEngine() as engine:
+                return await asyncio.gather(
+                    *[engine.call("plus", x, 1) for x in range(10)])
+        
+        self.assertEqual(asyncio.run(run()), list(range(1, 11)))
+    
+    def test_error(self):
+        async def run():
+            async with meg.AsyncEngine() as engine:
+                await engine.eval("error('meg:test', 'Test')")
+        
+        with self.assertRaises(meg.MatlabError):
+            asyncio.run(run())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import meg
+
+class TestCache(unittest.TestCase):
+    def test_digest(self):
+        data = numpy.random.random((3, 4))
+        self.assertEqual(meg.cache.digest(data), meg.cache.digest(data.copy()))
+        self.assertEqual(
+            meg.cache.digest(data[::2]), meg.cache.digest(data[::2].copy()))
+        for other in [data.astype(numpy.float32), data.T, data.ravel()]:
+            self.assertNotEqual(meg.cache.digest(data), meg.cache.digest(other))
+        
+        self.assertNotEqual(
+            meg.cache.digest(["ab"]), meg.cache.digest(["a", "b"]))
+        self.assertNotEqual(meg.cache.digest(1), meg.cache.digest(1.))
+        self.assertEqual(
+            meg.cache.digest({"a": [1, "b"]}), meg.cache.digest({"a": [1, "b"]}))
+        self.assertIsNone(meg.cache.digest(object()))
+        self.assertIsNone(meg.cache.digest([1, object()]))
+    
+    def test_modified_names(self):
+        self.assertEqual(
+            meg.cache.modified_names("x = 2*y; [a, b] = f(c)"),
+            set(["x", "y", "a", "b", "f", "c"]))
+        self.assertEqual(meg.cache.modified_names("clear a b"), set(["a", "b"]))
+        for expression in [
+                "clear", "clear all", "clear classes", "clear java",
+                "load data.mat", "eval(x)"]:
+            self.assertIsNone(meg.cache.modified_names(expression))
+    
+    def test_lru(self):
+        results = meg.cache.ResultCache(max_size=2000)
+        results.put("a", numpy.zeros(100))
+        results.put("b", numpy.zeros(100))
+        self.assertIsNotNone(results.get("a"))
+        results.put("c", numpy.zeros(100))
+        
+        # "b" is the least-recently used
+        self.assertEqual(len(results), 2)
+        self.assertIn("a", results)
+        self.assertNotIn("b", results)
+        self.assertLessEqual(results.size, 2000)
+        self.assertEqual((results.hits, results.misses), (1, 0))
+        
+        # Cached arrays are read-only
+        self.assertFalse(results.get("a").flags.writeable)
+        
+        # Results larger than the cache are not stored
+        results.put("d", numpy.zeros(1000))
+        self.assertNotIn("d", results)
+    
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = meg.cache.ResultCache(directory=directory)
+            results.put("a", (numpy.arange(3), numpy.float64(4)))
+            results.put("b", "not persisted")
+            self.assertEqual(os.listdir(directory), ["a.npz"])
+            
+            results = meg.cache.ResultCache(directory=directory)
+            value = results.get("a")
+            self.assertIsInstance(value, tuple)
+            numpy.testing.assert_array_equal(value[0], numpy.arange(3))
+            self.assertEqual(value[1], 4)
+            self.assertIsInstance(value[1], numpy.float64)
+            self.assertIsNone(results.get("b"))
+            
+            results.clear()
+            self.assertEqual(os.listdir(directory), [])
+    
+    def test_memoize(self):
+        calls = []
+        
+        @meg.memoize
+        def function(x, y=1):
+            calls.append(x)
+            return y
+        
+        self.assertEqual(function(2), 1)
+        self.assertEqual(function(2), 1)
+        self.assertEqual(function(2, y=3), 3)
+        self.assertEqual(calls, [2, 2])
+        self.assertEqual(function.cache.hits, 1)
+        
+        # Arguments which cannot be digested are not cached
+        function(numpy.array([object()]))
+        function(numpy.array([object()]))
+        self.assertEqual(len(calls), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,10 @@ import os
 import unittest
 
 import numpy
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
 
 import meg
 
@@ -133,6 +137,23 @@ class TestToPython(unittest.TestCase):
                     [1+2j, 4+5j, 7+8j, 10+11j, 13+14j], 
                     [2+3j, 5+6j, 8+9j, 11+12j, 14+15j]])
     
+    def test_array_complex_view(self):
+        if not meg.interleaved_complex:
+            self.skipTest("Complex data is not interleaved")
+        types = [("double", numpy.complex128), ("single", numpy.complex64)]
+        for type_m, type_p in types:
+            meg.libengine.engEvalString(
+                self.engine, 
+                "m = cast(reshape(0:14, 3, 5)*(1+2i), '{}')".format(
+                    type_m).encode())
+            m = meg.Array(meg.libengine.engGetVariable(self.engine, b"m"))
+            m = meg.converters.to_python(m, False)
+            
+            self.assertEqual(m.dtype, type_p)
+            self.assertFalse(m.flags.owndata)
+            numpy.testing.assert_array_almost_equal(
+                m, numpy.arange(15).reshape((3, 5), order="F")*(1+2j))
+    
     def test_array_logical(self):
         meg.libengine.engEvalString(
             self.engine, b"m = [true false false; false false true]")
@@ -182,6 +203,31 @@ class TestToPython(unittest.TestCase):
         numpy.testing.assert_array_equal(
             m["test"][0,1], numpy.array([[7,8], [9,10], [11,12]]))
 
+    @unittest.skipIf(scipy is None, "scipy is not available")
+    def test_sparse(self):
+        meg.libengine.engEvalString(
+            self.engine, b"m = sparse([1 3 2], [1 1 4], [1.5 2 -3], 3, 5)")
+        m = meg.libengine.engGetVariable(self.engine, b"m")
+        m = meg.converters.to_python(m)
+        
+        self.assertIsInstance(m, scipy.sparse.csc_matrix)
+        self.assertEqual(m.shape, (3, 5))
+        self.assertEqual(m.dtype, numpy.double)
+        numpy.testing.assert_array_equal(
+            m.toarray(), [[1.5, 0, 0, 0, 0], [0, 0, 0, -3, 0], [2, 0, 0, 0, 0]])
+    
+    @unittest.skipIf(scipy is None, "scipy is not available")
+    def test_sparse_logical(self):
+        meg.libengine.engEvalString(
+            self.engine, b"m = sparse(logical([1 0; 0 0; 0 1]))")
+        m = meg.libengine.engGetVariable(self.engine, b"m")
+        m = meg.converters.to_python(m)
+        
+        self.assertIsInstance(m, scipy.sparse.csc_matrix)
+        self.assertEqual(m.dtype, bool)
+        numpy.testing.assert_array_equal(
+            m.toarray(), [[True, False], [False, False], [False, True]])
+
 class TestToMATLAB(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -287,6 +333,24 @@ class TestToMATLAB(unittest.TestCase):
             self.assertEqual(p_1.dtype, p_2.dtype)
             numpy.testing.assert_array_almost_equal(p_1, p_2)
     
+    def test_array_strided(self):
+        base = numpy.arange(60).reshape(3, 4, 5) * (1+2j)
+        for p_1 in [base[::2, :, ::-1], base.T, base.real[:, 1:3, :]]:
+            m = meg.converters.to_matlab(p_1)
+            p_2 = meg.converters.to_python(m)
+            
+            self.assertEqual(p_1.shape, p_2.shape)
+            self.assertEqual(p_1.dtype, p_2.dtype)
+            numpy.testing.assert_array_equal(p_1, p_2)
+    
+    def test_array_empty(self):
+        p_1 = numpy.empty((0, 3))
+        m = meg.converters.to_matlab(p_1)
+        p_2 = meg.converters.to_python(m)
+        
+        self.assertEqual(p_1.shape, p_2.shape)
+        self.assertEqual(p_1.dtype, p_2.dtype)
+    
     def test_array_logical(self):
         p_1 = numpy.array([[True, False, False], [False, False, True]])
         m = meg.converters.to_matlab(p_1)
@@ -346,5 +410,21 @@ class TestToMATLAB(unittest.TestCase):
         numpy.testing.assert_array_equal(
             p_2["test"][0,1], numpy.array([[7,8], [9,10], [11,12]]))
     
+    @unittest.skipIf(scipy is None, "scipy is not available")
+    def test_sparse(self):
+        p_1s = [
+            scipy.sparse.random(40, 30, 0.1, format="csc"),
+            scipy.sparse.random(40, 30, 0.1, format="coo")*(1+2j),
+            scipy.sparse.csr_matrix(numpy.eye(5, dtype=bool)),
+            scipy.sparse.csc_matrix((4, 3))]
+        for p_1 in p_1s:
+            m = meg.converters.to_matlab(p_1)
+            p_2 = meg.converters.to_python(m)
+            
+            self.assertIsInstance(p_2, scipy.sparse.csc_matrix)
+            self.assertEqual(p_1.shape, p_2.shape)
+            self.assertEqual(p_1.dtype, p_2.dtype)
+            numpy.testing.assert_array_equal(p_1.toarray(), p_2.toarray())
+    
 if __name__ == "__main__":
     unittest.main()
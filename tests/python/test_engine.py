@@ -1,3 +1,4 @@
+import concurrent.futures
 import os
 import unittest
 
@@ -11,6 +12,38 @@ class TestEngine(unittest.TestCase):
         engine.open()
         engine.close()
         
+    def test_background(self):
+        engine = meg.Engine(
+            profile="minimal", 
+            warm_up=meg.startup.warm_up(expressions=["x = 42;"]))
+        engine.open(background=True)
+        # Commands are queued until the engine is started
+        self.assertEqual(engine["x"], 42)
+        self.assertTrue(engine.ready())
+        self.assertEqual(
+            set(engine.startup_times), 
+            set(["start", "setup", "warm_up", "total"]))
+        self.assertEqual(engine.call("usejava", "jvm"), False)
+        engine.close()
+        self.assertFalse(engine.ready())
+    
+    def test_profile(self):
+        with self.assertRaises(ValueError):
+            meg.startup.options("unknown")
+        self.assertEqual(
+            meg.startup.options(["-nojvm"]), ["-nojvm"])
+    
+    def test_compute_threads(self):
+        with meg.Engine(threads=1) as engine:
+            self.assertEqual(engine.call("maxNumCompThreads"), 1)
+        
+        count = len(meg.resources.cpus())
+        with meg.Engine() as first, meg.Engine() as second:
+            # Wait for the re-balancing
+            first.submit(lambda: None).result()
+            self.assertEqual(
+                first.call("maxNumCompThreads"), max(1, count//2))
+    
     def test_context_manager(self):
         with meg.Engine() as engine:
             pass
@@ -22,6 +55,167 @@ class TestEngine(unittest.TestCase):
             engine.eval("count = numel(data)")
             self.assertEqual(engine.get("count"), 12)
     
+    def test_output(self):
+        outputs = []
+        engine = meg.Engine(output_size=16, output_callback=outputs.append)
+        with engine:
+            self.assertEqual(engine("disp('foo')"), "foo\n")
+            self.assertEqual(engine("x = 1;"), "")
+            self.assertEqual(outputs, ["foo\n"])
+            
+            # The buffer grows
+            engine("disp(repmat('a', 1, 100))")
+            self.assertGreater(engine.output_size, 16)
+            self.assertEqual(engine("disp(repmat('a', 1, 20))"), 20*"a"+"\n")
+        
+        engine = meg.Engine(output_size=16)
+        with engine:
+            # Truncated outputs are kept, and caught errors are not raised
+            output = engine(
+                "try, error('meg:test', 'Caught'); end; "
+                "disp(repmat('a', 1, 100))")
+            self.assertTrue(output.startswith(15*"a"))
+            with self.assertRaises(meg.MatlabError) as context:
+                engine("disp(repmat('a', 1, 1000)); error('meg:test', 'Test')")
+            self.assertEqual(context.exception.identifier, "meg:test")
+    
+    def test_error(self):
+        with meg.Engine() as engine:
+            with self.assertRaises(meg.MatlabError) as context:
+                engine("disp('foo'); error('meg:test', 'Test %d', 42)")
+            self.assertEqual(context.exception.identifier, "meg:test")
+            self.assertEqual(context.exception.message, "Test 42")
+            
+            with self.assertRaises(meg.MatlabError) as context:
+                engine("x = [1 2")
+            self.assertNotEqual(context.exception.message, "")
+            
+            with self.assertRaises(meg.MatlabError) as context:
+                engine.compile("error('meg:test', 'Compiled');")()
+            self.assertEqual(context.exception.message, "Compiled")
+            self.assertEqual(len(context.exception.stack), 1)
+            
+            # Errors do not leave variables behind
+            engine("count = numel(who)")
+            self.assertEqual(engine["count"], 1)
+    
+    def test_timeout(self):
+        with meg.Engine() as engine:
+            self.assertEqual(engine("disp(42)", timeout=10), "    42\n")
+            
+            pid = engine.pid
+            with self.assertRaises(TimeoutError):
+                engine("pause(60)", timeout=1)
+            self.assertEqual((engine.timeouts, engine.restarts), (1, 1))
+            self.assertNotEqual(engine.pid, pid)
+            
+            # The restarted engine is usable
+            engine["x"] = 42
+            self.assertEqual(engine["x"], 42)
+    
+    def test_threads(self):
+        with meg.Engine() as engine:
+            def work(index):
+                with engine.namespace() as namespace:
+                    data = numpy.random.random((10, 10))
+                    namespace["x"] = data
+                    namespace.eval("{y} = 2*{x};")
+                    return numpy.array_equal(namespace["y"], 2*data)
+            
+            with concurrent.futures.ThreadPoolExecutor(8) as executor:
+                self.assertTrue(all(executor.map(work, range(100))))
+            
+            # The namespaces are cleared
+            engine("count = numel(who)")
+            self.assertEqual(engine["count"], 1)
+    
+    def test_submit(self):
+        with meg.Engine() as engine:
+            future = engine.submit(engine.call, "plus", 1, 2)
+            self.assertEqual(future.result(), 3)
+    
+    def test_get_view(self):
+        with meg.Engine() as engine:
+            engine("data = reshape(0:11, 3, 4)")
+            data = engine.get("data", copy=False)
+            self.assertFalse(data.flags.owndata)
+            self.assertTrue(data.flags.f_contiguous)
+            numpy.testing.assert_array_equal(
+                data, numpy.arange(12).reshape((3, 4), order="F"))
+    
+    def test_get_index(self):
+        with meg.Engine() as engine:
+            data = numpy.random.random((3, 4, 5, 6))
+            engine["data"] = data
+            indices = [
+                (slice(None), slice(None), 2, 3), (Ellipsis, -1), (1,),
+                (slice(None, None, -2), 0, slice(1, -1), slice(4, 1, -1)),
+                (slice(-10, 10), Ellipsis, slice(5, None)), (0, 1, 2, 3)]
+            for index in indices:
+                numpy.testing.assert_array_equal(
+                    engine.get("data", index), data[index])
+            numpy.testing.assert_array_equal(
+                engine.ref("data")[:, 1:3, 4], data[:, 1:3, 4])
+            
+            # Temporary variables are cleared
+            engine("count = numel(who)")
+            self.assertEqual(engine["count"], 1)
+    
+    def test_assign(self):
+        with meg.Engine() as engine:
+            data = numpy.random.random((3, 4, 5))
+            engine["data"] = data
+            
+            data[:, :, 2] = numpy.arange(12).reshape(3, 4)
+            engine.assign("data", (slice(None), slice(None), 2), data[:, :, 2])
+            data[1, ::2] = 42
+            engine.assign("data", (1, slice(None, None, 2)), 42)
+            data[..., -1] = data[..., 0]
+            engine.ref("data")[..., -1] = data[..., 0]
+            
+            numpy.testing.assert_array_equal(engine["data"], data)
+            
+            # Temporary variables are cleared
+            engine("count = numel(who)")
+            self.assertEqual(engine["count"], 1)
+    
+    def test_iter_chunks(self):
+        with meg.Engine() as engine:
+            data = numpy.random.random((3, 4, 5))
+            engine["data"] = data
+            
+            chunks = [
+                x.copy() for x in engine.iter_chunks("data", chunk_size=2)]
+            self.assertEqual(
+                [x.shape for x in chunks], [(3, 4, 2), (3, 4, 2), (3, 4, 1)])
+            numpy.testing.assert_array_equal(
+                numpy.concatenate(chunks, 2), data)
+            
+            chunks = list(engine.iter_chunks("data", 0, reuse=False))
+            self.assertEqual(len(chunks), 3)
+            numpy.testing.assert_array_equal(
+                numpy.concatenate(chunks, 0), data)
+    
+    def test_get_unconverted(self):
+        with meg.Engine() as engine:
+            engine("f = @sin")
+            f = engine["f"]
+            self.assertIsInstance(f, meg.Array)
+            self.assertTrue(f.owned)
+            f.close()
+    
+    def test_call(self):
+        with meg.Engine() as engine:
+            data = numpy.array([[3, 1, 2], [5, 6, 4]])
+            numpy.testing.assert_array_equal(
+                engine.call("max", data), [[5, 6, 4]])
+            self.assertEqual(engine.call("max", [3, 1, 2], nargout=2), (3, 1))
+            self.assertEqual(engine.call("rng", 42, nargout=0), None)
+            
+            # Temporary variables are cleared
+            engine("count = numel(who)")
+            self.assertEqual(engine["count"], 0)
+    
     def test_update_dict(self):
         with meg.Engine() as engine:
             data_1 = numpy.empty((4,3))
@@ -39,6 +233,102 @@ class TestEngine(unittest.TestCase):
             engine.eval("count = numel(data_1)+numel(data_2)")
             self.assertEqual(engine.get("count"), 42)
     
+    def test_update_batched(self):
+        with meg.Engine() as engine:
+            data = {
+                "data_1": numpy.arange(12).reshape(4, 3), "data_2": "foo",
+                "data_3": {"x": 1, "y": [1, 2, 3]}}
+            engine.update(data, batched=True)
+            
+            # Only the variables are created
+            engine("count = numel(who)")
+            self.assertEqual(engine["count"], 3)
+            
+            # Same values as the non-batched path
+            for name, value in data.items():
+                engine["expected"] = value
+                engine("same = isequal({}, expected)".format(name))
+                self.assertEqual(engine["same"], True)
+    
+    def test_get_many(self):
+        with meg.Engine() as engine:
+            engine("a = reshape(0:11, 3, 4); b = 'foo'; c = int8(42);")
+            values = engine.get_many(["a", "b", "c"])
+            self.assertEqual(set(values.keys()), set(["a", "b", "c"]))
+            for name, value in values.items():
+                numpy.testing.assert_array_equal(value, engine.get(name))
+                self.assertEqual(
+                    getattr(value, "dtype", None), 
+                    getattr(engine.get(name), "dtype", None))
+    
+    def test_call_cache(self):
+        with meg.Engine() as engine:
+            data = numpy.random.random((4, 4))
+            first = engine.call("inv", data, cache=True)
+            numpy.testing.assert_array_equal(
+                engine.call("inv", data, cache=True), first)
+            self.assertEqual(engine.result_cache.hits, 1)
+            self.assertEqual(engine.result_cache.misses, 1)
+            
+            engine.call("inv", 2*data, cache=True)
+            self.assertEqual(engine.result_cache.misses, 2)
+    
+    def test_apply_batch(self):
+        with meg.Engine() as engine:
+            data = [numpy.random.random((3, 3)) for _ in range(10)]
+            numpy.testing.assert_array_equal(
+                engine.apply_batch("trace", data), 
+                [numpy.trace(x) for x in data])
+            
+            maxima, indices = engine.apply_batch(
+                "max", [[1, 2], [3, 4, 5]], nargout=2, uniform_output=False)
+            self.assertEqual(maxima, [2, 5])
+            self.assertEqual(indices, [2, 3])
+            
+            self.assertEqual(engine.apply_batch("numel", []).shape, (0,))
+            
+            # Temporary variables are cleared
+            engine("count = numel(who)")
+            self.assertEqual(engine["count"], 1)
+    
+    def test_compile(self):
+        with meg.Engine() as engine:
+            function = engine.compile(
+                "s = a+b; d = a-b;", ["a", "b"], ["s", "d"])
+            self.assertEqual(function(3., 2.), (5., 1.))
+            self.assertIs(
+                engine.compile("s = a+b; d = a-b;", ["a", "b"], ["s", "d"]),
+                function)
+            
+            directory = engine._functions_directory
+            self.assertTrue(os.path.isdir(directory))
+        self.assertFalse(os.path.exists(directory))
+    
+    def test_put_cache(self):
+        with meg.Engine(put_cache=True) as engine:
+            data = numpy.random.random((3, 4))
+            engine["data"] = data
+            
+            # The cached value is not transferred again: a modification made
+            # behind the back of the engine is not overwritten.
+            engine.libengine.engEvalString(engine._engine, b"data(1) = 42")
+            engine["data"] = data
+            self.assertEqual(engine["data"][0, 0], 42)
+            engine.invalidate("data")
+            engine["data"] = data
+            numpy.testing.assert_array_equal(engine["data"], data)
+            
+            # Modified values, and values modified in MATLAB, are transferred
+            data[0, 0] = 1
+            engine["data"] = data
+            numpy.testing.assert_array_equal(engine["data"], data)
+            engine("data = 2*data")
+            engine["data"] = data
+            numpy.testing.assert_array_equal(engine["data"], data)
+            engine("clear")
+            engine["data"] = data
+            numpy.testing.assert_array_equal(engine["data"], data)
+    
     def test_items(self):
         with meg.Engine() as engine:
             data = numpy.empty((4,3))
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy
+
+import meg
+
+class TestSubscripts(unittest.TestCase):
+    def test_invalid(self):
+        with self.assertRaises(IndexError):
+            meg.indexing.Subscripts((Ellipsis, 1, Ellipsis))
+        with self.assertRaises(IndexError):
+            meg.indexing.Subscripts([1, 2])
+        with self.assertRaises(IndexError):
+            meg.indexing.Subscripts(1.5)
+        with self.assertRaises(ValueError):
+            meg.indexing.Subscripts(slice(None, None, 0)).code("x", "s")
+    
+    def test_count(self):
+        self.assertEqual(meg.indexing.Subscripts(1).count, 1)
+        self.assertEqual(meg.indexing.Subscripts((1, Ellipsis, 2)).count, 2)
+        self.assertEqual(meg.indexing.Subscripts(Ellipsis).count, 0)
+    
+    def test_code(self):
+        subscripts = meg.indexing.Subscripts(
+            (slice(None), 3, Ellipsis, -1))
+        self.assertEqual(
+            subscripts.code("x", "s"), 
+            "s = repmat({':'}, 1, max(ndims(x), 3)); "
+            "s{2} = 4; "
+            "s{numel(s)-0} = size(x, numel(s)-0)+0;")
+    
+    def test_shape(self):
+        subscripts = meg.indexing.Subscripts(
+            (slice(None), slice(None), 40, 3))
+        self.assertEqual(subscripts.shape((10, 20), 4), (10, 20))
+        
+        subscripts = meg.indexing.Subscripts((Ellipsis, 2, slice(None)))
+        self.assertEqual(subscripts.shape((5, 6, 1, 7), 4), (5, 6, 7))
+        
+        # Trailing singletons
+        subscripts = meg.indexing.Subscripts((0, slice(0, 1)))
+        self.assertEqual(subscripts.shape((1, 1), 3), (1, 1))
+    
+    def test_reshape(self):
+        subscripts = meg.indexing.Subscripts((1, slice(None)))
+        data = numpy.arange(4).reshape(1, 4)
+        numpy.testing.assert_array_equal(
+            subscripts.reshape(data, 2), numpy.arange(4))
+        self.assertEqual(subscripts.reshape("foo", 2), "foo")
+        
+        subscripts = meg.indexing.Subscripts((1, 2))
+        self.assertEqual(subscripts.reshape(numpy.float64(3), 2), 3)
+
+if __name__ == "__main__":
+    unittest.main()
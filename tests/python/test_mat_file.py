@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import meg
+
+class TestMatFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "data.mat")
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_write_read(self):
+        data = numpy.random.random((3, 4))
+        with meg.MatFile(self.path, "w") as mat_file:
+            mat_file["data"] = data
+            mat_file["text"] = "foo"
+        
+        with meg.MatFile(self.path) as mat_file:
+            self.assertEqual(sorted(mat_file), ["data", "text"])
+            self.assertEqual(len(mat_file), 2)
+            self.assertIn("data", mat_file)
+            self.assertNotIn("other", mat_file)
+            numpy.testing.assert_array_equal(mat_file["data"], data)
+            self.assertEqual(mat_file["text"], "foo")
+            with self.assertRaises(KeyError):
+                mat_file["other"]
+            self.assertIsNone(mat_file.get("other"))
+    
+    def test_info(self):
+        with meg.MatFile(self.path, "w") as mat_file:
+            mat_file["data"] = numpy.zeros((3, 4, 5), numpy.int16)
+            mat_file["text"] = "foo"
+        
+        with meg.MatFile(self.path) as mat_file:
+            self.assertEqual(
+                mat_file.info(), 
+                {"data": ((3, 4, 5), "int16"), "text": ((1, 3), "char")})
+    
+    def test_update(self):
+        with meg.MatFile(self.path, "w") as mat_file:
+            mat_file.update(foo=1., bar=2.)
+        with meg.MatFile(self.path, "u") as mat_file:
+            del mat_file["foo"]
+            mat_file["baz"] = 3.
+        with meg.MatFile(self.path) as mat_file:
+            self.assertEqual(dict(mat_file), {"bar": 2., "baz": 3.})
+    
+    def test_empty(self):
+        with meg.MatFile(self.path, "w") as mat_file:
+            self.assertEqual(list(mat_file), [])
+
+if __name__ == "__main__":
+    unittest.main()
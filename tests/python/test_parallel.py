@@ -0,0 +1,35 @@
+import unittest
+
+import numpy
+
+import meg
+
+class TestMap(unittest.TestCase):
+    def test_ordered(self):
+        data = [numpy.random.random((4, 5)) for _ in range(10)]
+        results = list(meg.map("sum", data, engines=2))
+        self.assertEqual(len(results), len(data))
+        for item, result in zip(data, results):
+            numpy.testing.assert_array_almost_equal(result, item.sum(axis=0))
+    
+    def test_unordered(self):
+        results = meg.map("double", range(10), engines=2, ordered=False)
+        self.assertEqual(sorted(results), list(range(10)))
+    
+    def test_arguments(self):
+        results = meg.map("plus", range(5), range(10, 15), engines=2)
+        self.assertEqual(list(results), [10, 12, 14, 16, 18])
+    
+    def test_nargout(self):
+        data = [[3, 1, 2], [5, 6, 4]]
+        results = list(meg.map("max", data, engines=2, nargout=2))
+        self.assertEqual(results, [(3, 1), (6, 2)])
+    
+    def test_pool(self):
+        with meg.EnginePool(2) as pool:
+            results = meg.map("double", range(4), engines=pool)
+            self.assertEqual(list(results), list(range(4)))
+            self.assertEqual(pool.available, 2)
+
+if __name__ == "__main__":
+    unittest.main()
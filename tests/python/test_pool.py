@@ -0,0 +1,87 @@
+import queue
+import threading
+import unittest
+
+import meg
+
+class TestEnginePool(unittest.TestCase):
+    def test_engine(self):
+        with meg.EnginePool(2) as pool:
+            self.assertEqual(pool.available, 2)
+            with pool.engine() as engine:
+                self.assertEqual(pool.in_use, 1)
+                self.assertEqual(pool.utilization, 0.5)
+                engine("x = 42")
+                self.assertEqual(engine["x"], 42)
+            self.assertEqual(pool.in_use, 0)
+            self.assertEqual(pool.available, 2)
+    
+    def test_clear(self):
+        with meg.EnginePool(1) as pool:
+            with pool.engine() as engine:
+                engine("x = 42")
+            with pool.engine() as engine:
+                engine("count = numel(who)")
+                self.assertEqual(engine["count"], 0)
+    
+    def test_timeout(self):
+        with meg.EnginePool(1) as pool:
+            with pool.engine():
+                with self.assertRaises(queue.Empty):
+                    with pool.engine(timeout=0.1):
+                        pass
+    
+    def test_replace(self):
+        with meg.EnginePool(1) as pool:
+            with pool.engine() as engine:
+                engine("exit")
+            self.assertEqual(pool.replaced, 1)
+            with pool.engine() as engine:
+                engine("x = 42")
+                self.assertEqual(engine["x"], 42)
+    
+    def test_replace_failure(self):
+        with meg.EnginePool(1) as pool:
+            # The replacement engine cannot be started: the slot is kept, and
+            # the exception of the caller is not hidden
+            pool.command = "/nonexistent/matlab"
+            with self.assertRaises(ValueError):
+                with pool.engine() as engine:
+                    engine("exit")
+                    raise ValueError()
+            self.assertEqual(pool.replaced, 0)
+            self.assertEqual(pool.available, 1)
+            
+            # The replacement is tried again when borrowing
+            with self.assertRaises(RuntimeError):
+                with pool.engine() as engine:
+                    pass
+            self.assertEqual(pool.available, 1)
+            
+            pool.command = None
+            with pool.engine() as engine:
+                engine("x = 42")
+                self.assertEqual(engine["x"], 42)
+            self.assertEqual(pool.replaced, 1)
+    
+    def test_threads(self):
+        results = {}
+        def worker(pool, index):
+            with pool.engine() as engine:
+                engine["x"] = index
+                engine("y = 2*x")
+                results[index] = engine["y"]
+        
+        with meg.EnginePool(2) as pool:
+            threads = [
+                threading.Thread(target=worker, args=(pool, x)) 
+                for x in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        self.assertEqual(results, {x: 2*x for x in range(8)})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import gc
+import unittest
+
+import numpy
+
+import meg
+
+class TestReference(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = meg.Engine()
+        cls.engine.open()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+    
+    def setUp(self):
+        self.engine("clear")
+    
+    def test_attributes(self):
+        self.engine("x = zeros(3, 4, 5, 'single')")
+        x = self.engine.ref("x")
+        self.assertEqual(x.name, "x")
+        self.assertEqual(x.shape, (3, 4, 5))
+        self.assertEqual(x.ndim, 3)
+        self.assertEqual(x.size, 60)
+        self.assertEqual(x.class_name, "single")
+    
+    def test_fetch(self):
+        self.engine("x = reshape(0:11, 3, 4)")
+        x = self.engine.ref("x")
+        numpy.testing.assert_array_equal(
+            x.fetch(), numpy.arange(12).reshape((3, 4), order="F"))
+    
+    def test_not_owned(self):
+        self.engine("x = 42")
+        x = self.engine.ref("x")
+        self.assertFalse(x.owned)
+        del x
+        gc.collect()
+        self.assertEqual(self.engine["x"], 42)
+    
+    def test_owned(self):
+        self.engine("x = 42")
+        x = self.engine.ref("x", owned=True)
+        self.assertTrue(x.owned)
+        del x
+        gc.collect()
+        # The variable is cleared before the next command
+        self.assertEqual(self.engine._pending_clears, ["x"])
+        self.engine("found = exist('x', 'var')")
+        self.assertEqual(self.engine["found"], 0)
+    
+    def test_eval(self):
+        self.engine("x = 42")
+        x = self.engine.ref("x")
+        self.engine("y = 2*{}", x)
+        self.assertEqual(self.engine["y"], 84)
+    
+    def test_call(self):
+        data = numpy.random.random((10, 10))
+        
+        # Keep the intermediate result in MATLAB
+        inverse = self.engine.call("inv", data, fetch=False)
+        self.assertIsInstance(inverse, meg.Reference)
+        self.assertTrue(inverse.owned)
+        self.assertEqual(inverse.shape, (10, 10))
+        
+        product = self.engine.call("mtimes", data, inverse)
+        numpy.testing.assert_array_almost_equal(product, numpy.eye(10))
+        
+        name = inverse.name
+        del inverse
+        gc.collect()
+        self.engine("found = exist('{}', 'var')".format(name))
+        self.assertEqual(self.engine["found"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
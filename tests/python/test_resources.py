@@ -0,0 +1,29 @@
+import unittest
+
+import meg
+
+class TestResources(unittest.TestCase):
+    def test_share(self):
+        count = len(meg.resources.cpus())
+        self.assertEqual(meg.resources.share(1), count)
+        self.assertEqual(meg.resources.share(2*count), 1)
+        
+        # Threads of the engines with a fixed number of threads
+        self.assertEqual(meg.resources.share(1, 1), max(1, count-1))
+        self.assertEqual(meg.resources.share(1, count), 1)
+    
+    def test_split(self):
+        cpus = meg.resources.cpus()
+        
+        sets = meg.resources.split(len(cpus))
+        self.assertEqual(sorted(x for set_ in sets for x in set_), cpus)
+        
+        sets = meg.resources.split(2*len(cpus))
+        self.assertEqual(len(sets), 2*len(cpus))
+        self.assertTrue(all(len(x) == 1 for x in sets))
+        
+        sets = meg.resources.split(1)
+        self.assertEqual(sets, [cpus])
+
+if __name__ == "__main__":
+    unittest.main()
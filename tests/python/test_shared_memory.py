@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import meg
+
+class TestSharedMemory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = meg.Engine(shared_memory_threshold=0)
+        cls.engine.open()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+    
+    def setUp(self):
+        self.engine("clear")
+    
+    def test_accepts(self):
+        self.assertFalse(meg.shared_memory.accepts(numpy.zeros(10), None))
+        self.assertFalse(meg.shared_memory.accepts(numpy.zeros(10), 100))
+        self.assertTrue(meg.shared_memory.accepts(numpy.zeros(10), 80))
+        self.assertFalse(meg.shared_memory.accepts([1., 2.], 0))
+        self.assertFalse(meg.shared_memory.accepts(numpy.array(["a"]), 0))
+    
+    def test_round_trip(self):
+        arrays = [
+            (numpy.random.random((3, 4, 5)), "double"),
+            (
+                numpy.random.random((3, 4)).astype(numpy.float32)[::2, 1:],
+                "single"),
+            (numpy.arange(12, dtype=numpy.int16), "int16"),
+            (numpy.random.random((3, 4)) > 0.5, "logical"),
+            (
+                numpy.random.random((3, 4))+1j*numpy.random.random((3, 4)),
+                "double")]
+        for array, class_name in arrays:
+            self.engine["data"] = array
+            self.assertEqual(self.engine.ref("data").class_name, class_name)
+            
+            data = self.engine["data"]
+            self.assertEqual(data.dtype, array.dtype)
+            numpy.testing.assert_array_equal(
+                data, array.reshape(data.shape))
+    
+    def test_memmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.bin")
+            array = numpy.memmap(
+                path, numpy.float64, "w+", shape=(3, 4), order="F")
+            array[...] = numpy.random.random((3, 4))
+            self.engine["data"] = array
+            numpy.testing.assert_array_equal(self.engine["data"], array)
+            del array
+    
+    def test_view(self):
+        self.engine("data = reshape(0:11, 3, 4)")
+        data = self.engine.get("data", copy=False)
+        self.assertIsInstance(data, numpy.memmap)
+        numpy.testing.assert_array_equal(
+            data, numpy.arange(12).reshape((3, 4), order="F"))
+    
+    def test_fallback(self):
+        self.engine("text = 'bar'; empty = []")
+        self.assertEqual(self.engine["text"], "bar")
+        self.assertEqual(self.engine["empty"].size, 0)
+    
+    def test_scalar(self):
+        # Same as the engine channel
+        self.engine("x = 42; flag = true")
+        self.assertEqual(self.engine["x"], 42)
+        self.assertNotIsInstance(self.engine["x"], numpy.ndarray)
+        self.assertEqual(self.engine["flag"], True)
+        self.assertEqual(self.engine.ref("x").size, 1)
+    
+    def test_no_leftovers(self):
+        directory = meg.shared_memory.directory or tempfile.gettempdir()
+        before = set(os.listdir(directory))
+        self.engine["data"] = numpy.zeros((10, 10))
+        self.engine["data"]
+        self.assertEqual(set(os.listdir(directory)), before)
+        
+        self.engine("count = numel(who)")
+        self.assertEqual(self.engine["count"], 2)
+
+if __name__ == "__main__":
+    unittest.main()